@@ -0,0 +1,5 @@
+import os
+
+# Importing the agents package builds the shared OpenAI clients, which only
+# need a key to exist; the benchmarks never reach the network.
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
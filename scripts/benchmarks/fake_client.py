@@ -0,0 +1,103 @@
+import json
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+def make_tools(count: int, payload_size: int) -> List[Callable]:
+    """Create `count` cheap agent functions that return `payload_size` characters."""
+    payload = "x" * payload_size
+
+    def make_tool(index: int) -> Callable:
+        def tool(query: str, limit: int = 10) -> str:
+            return payload
+        tool.__name__ = f"bench_tool_{index}"
+        tool.__doc__ = f"Benchmark tool number {index}."
+        return tool
+
+    return [make_tool(index) for index in range(count)]
+
+def completion_payload(content: str = None, tool_calls: List[Dict] = None) -> Dict:
+    message = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    return {
+        "id": "chatcmpl-bench",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "bench-model",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": message}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+def chunk_payloads(content: str = None, tool_calls: List[Dict] = None, fragment_size: int = 16) -> List[Dict]:
+    """Split a message into streamed deltas the way the API does."""
+    deltas = [{"role": "assistant", "content": ""}]
+    if content:
+        for start in range(0, len(content), fragment_size):
+            deltas.append({"content": content[start:start + fragment_size]})
+    for index, tool_call in enumerate(tool_calls or []):
+        deltas.append({"tool_calls": [{
+            "index": index,
+            "id": tool_call["id"],
+            "type": "function",
+            "function": {"name": tool_call["function"]["name"], "arguments": ""},
+        }]})
+        arguments = tool_call["function"]["arguments"]
+        for start in range(0, len(arguments), fragment_size):
+            deltas.append({"tool_calls": [{
+                "index": index,
+                "function": {"arguments": arguments[start:start + fragment_size]},
+            }]})
+    return [
+        {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "bench-model",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+        for delta in deltas
+    ]
+
+class FakeChatClient:
+    """
+    In-process stand-in for the OpenAI client used by Swarm.
+
+    Answers with one tool call per turn, cycling through `tool_names`, until
+    `turns` tool round-trips have happened, then with a final text answer.
+    Responses are built once up front so the client itself costs almost
+    nothing; `client_time` accumulates the time spent inside it anyway.
+    """
+
+    def __init__(self, tool_names: List[str], turns: int, payload_size: int, fragment_size: int = 16):
+        self.turns = turns
+        self.client_time = 0.0
+        arguments = json.dumps({"query": "q" * payload_size, "limit": 10})
+        tool_turns = [
+            [{
+                "id": f"call_{turn}",
+                "type": "function",
+                "function": {"name": tool_names[turn % len(tool_names)], "arguments": arguments},
+            }]
+            for turn in range(turns)
+        ]
+        answer = "a" * payload_size
+        self._completions = [completion_payload(tool_calls=calls) for calls in tool_turns]
+        self._completions.append(completion_payload(content=answer))
+        self._chunks = [chunk_payloads(tool_calls=calls, fragment_size=fragment_size) for calls in tool_turns]
+        self._chunks.append(chunk_payloads(content=answer, fragment_size=fragment_size))
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, messages: List[Dict], stream: bool = False, **params):
+        start = time.perf_counter()
+        turn = min(sum(1 for message in messages if message["role"] == "assistant"), self.turns)
+        if stream:
+            chunks = [ChatCompletionChunk.model_validate(chunk) for chunk in self._chunks[turn]]
+            self.client_time += time.perf_counter() - start
+            return iter(chunks)
+        completion = ChatCompletion.model_validate(self._completions[turn])
+        self.client_time += time.perf_counter() - start
+        return completion
+
@@ -0,0 +1,92 @@
+"""
+Compare model_to_dict with the json.loads(model_dump_json()) round trip.
+
+Converts completion messages and streamed deltas of several sizes both ways,
+checks that the results are identical and reports the time per conversion
+and the speedup as JSON.
+
+    python -m scripts.benchmarks.normalization
+"""
+
+import argparse
+import json
+import platform
+import timeit
+from typing import Callable, Dict, List
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from src.agents.swarm.util import model_to_dict
+from .fake_client import chunk_payloads, completion_payload
+
+DEFAULT_PAYLOAD_SIZES = [10, 1_000, 100_000]
+
+def round_trip_message(message):
+    return json.loads(message.model_dump_json())
+
+def round_trip_delta(delta):
+    return json.loads(delta.model_dump_json())
+
+def per_call(func: Callable, obj, number: int) -> float:
+    return min(timeit.repeat(lambda: func(obj), number=number, repeat=5)) / number
+
+def bench_object(kind: str, obj, payload_size: int, number: int, round_trip: Callable) -> Dict:
+    if round_trip(obj) != model_to_dict(obj):
+        raise AssertionError(f"model_to_dict differs from the JSON round trip for {kind}")
+    baseline = per_call(round_trip, obj, number)
+    fast = per_call(model_to_dict, obj, number)
+    return {
+        "kind": kind,
+        "payload_size": payload_size,
+        "round_trip_us": baseline * 1e6,
+        "model_to_dict_us": fast * 1e6,
+        "speedup": baseline / fast if fast else None,
+    }
+
+def objects(payload_size: int) -> List[tuple]:
+    tool_calls = [{
+        "id": "call_0",
+        "type": "function",
+        "function": {"name": "code_tool", "arguments": json.dumps({"code": "x" * payload_size})},
+    }]
+    text = ChatCompletion.model_validate(completion_payload(content="a" * payload_size)).choices[0].message
+    text.sender = "Agent"
+    tools = ChatCompletion.model_validate(completion_payload(tool_calls=tool_calls)).choices[0].message
+    tools.sender = "Agent"
+    chunks = chunk_payloads(content="a" * payload_size, tool_calls=tool_calls, fragment_size=max(payload_size, 1))
+    content_delta = ChatCompletionChunk.model_validate(chunks[1]).choices[0].delta
+    tool_delta = ChatCompletionChunk.model_validate(chunks[-1]).choices[0].delta
+    return [
+        ("text_message", text, round_trip_message),
+        ("tool_call_message", tools, round_trip_message),
+        ("content_delta", content_delta, round_trip_delta),
+        ("tool_call_delta", tool_delta, round_trip_delta),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OpenAI object to dict conversion")
+    parser.add_argument("--payload-sizes", type=int, nargs="+", default=DEFAULT_PAYLOAD_SIZES)
+    parser.add_argument("--number", type=int, default=2_000)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    results = [
+        bench_object(kind, obj, payload_size, args.number, round_trip)
+        for payload_size in args.payload_sizes
+        for kind, obj, round_trip in objects(payload_size)
+    ]
+    report = {
+        "benchmark": "normalization",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Check that a recorded Swarm conversation replays without a cache miss.
+
+Records a conversation that calls code_tool, whose output carries timings
+that differ on every run, against a scripted client, then replays it with
+no client at all, both without and with streaming. Exits non-zero if any
+completion misses the cache or the replayed answer differs.
+
+    python -m scripts.benchmarks.replay_check
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+from types import SimpleNamespace
+from typing import Dict, List
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from src.agents.swarm import Agent, AsyncSwarm, Swarm
+from src.agents.swarm.replay import AsyncReplayClient, ReplayClient, ReplayMiss
+from src.tools.code import code_tool
+from .fake_client import chunk_payloads, completion_payload
+
+SNIPPET = "print(sum(range(10)))"
+ANSWER = "The sum is 45."
+
+class ScriptedClient:
+    """Asks for one code_tool call, then answers; like a model with temperature 0."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, messages: List[Dict], stream: bool = False, **params):
+        self.calls += 1
+        if any(message["role"] == "tool" for message in messages):
+            content, tool_calls = ANSWER, None
+        else:
+            arguments = json.dumps({"code": SNIPPET, "language": "python"})
+            content, tool_calls = None, [{
+                "id": "call_code",
+                "type": "function",
+                "function": {"name": "code_tool", "arguments": arguments},
+            }]
+        if stream:
+            return iter([
+                ChatCompletionChunk.model_validate(chunk)
+                for chunk in chunk_payloads(content=content, tool_calls=tool_calls)
+            ])
+        return ChatCompletion.model_validate(completion_payload(content=content, tool_calls=tool_calls))
+
+class AsyncScriptedClient(ScriptedClient):
+    async def create(self, messages: List[Dict], stream: bool = False, **params):
+        return ScriptedClient.create(self, messages, stream=stream, **params)
+
+def conversation(swarm: Swarm, stream: bool) -> List[dict]:
+    agent = Agent(name="Replay check", functions=[code_tool])
+    messages = [{"role": "user", "content": "What is the sum of 0..9? Use code."}]
+    if not stream:
+        return swarm.run(agent=agent, messages=messages).messages
+    return list(swarm.run(agent=agent, messages=messages, stream=True))[-1]["response"].messages
+
+async def async_conversation(swarm: AsyncSwarm, stream: bool) -> List[dict]:
+    agent = Agent(name="Replay check", functions=[code_tool])
+    messages = [{"role": "user", "content": "What is the sum of 0..9? Use code."}]
+    if not stream:
+        return (await swarm.run(agent=agent, messages=messages)).messages
+    events = [event async for event in await swarm.run(agent=agent, messages=messages, stream=True)]
+    return events[-1]["response"].messages
+
+def check(name: str, recorded: List[dict], replay) -> bool:
+    try:
+        replayed = replay()
+    except ReplayMiss as e:
+        print(f"{name}: FAILED, {e}")
+        return False
+    if replayed[-1]["content"] != recorded[-1]["content"] or len(replayed) != len(recorded):
+        print(f"{name}: FAILED, replayed conversation differs from the recording")
+        return False
+    tool_output = next(message["content"] for message in recorded if message["role"] == "tool")
+    if "Execution time" not in tool_output:
+        print(f"{name}: FAILED, code_tool did not run: {tool_output.strip()}")
+        return False
+    print(f"{name}: ok")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Check record/replay of a Swarm run that calls code_tool")
+    parser.parse_args()
+
+    ok = True
+    for stream in (False, True):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            recorder = Swarm(client=ReplayClient(ScriptedClient(), mode="record", cache_dir=cache_dir))
+            recorded = conversation(recorder, stream)
+            player = Swarm(client=ReplayClient(mode="replay", cache_dir=cache_dir))
+            ok &= check(f"run stream={stream}", recorded, lambda: conversation(player, stream))
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            recorder = AsyncSwarm(client=AsyncReplayClient(AsyncScriptedClient(), mode="record", cache_dir=cache_dir))
+            recorded = asyncio.run(async_conversation(recorder, stream))
+            player = AsyncSwarm(client=AsyncReplayClient(mode="replay", cache_dir=cache_dir))
+            ok &= check(f"async run stream={stream}", recorded, lambda: asyncio.run(async_conversation(player, stream)))
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
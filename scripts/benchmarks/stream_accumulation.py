@@ -0,0 +1,132 @@
+"""
+Compare StreamAccumulator with per-delta merge_chunk on long streams.
+
+Builds streamed deltas for a long text answer and for large tool call
+arguments (such as a code_tool payload), accumulates them both ways, checks
+that the final messages are identical and reports the time each takes as
+JSON.
+
+    python -m scripts.benchmarks.stream_accumulation
+"""
+
+import argparse
+import copy
+import json
+import platform
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from openai.types.chat import ChatCompletionChunk
+
+from src.agents.swarm.util import StreamAccumulator, merge_chunk, model_to_dict
+from .fake_client import chunk_payloads
+
+DEFAULT_STREAM_LENGTHS = [1_000, 10_000, 100_000]
+
+def new_message() -> Dict:
+    return {
+        "content": "",
+        "sender": "Agent",
+        "role": "assistant",
+        "function_call": None,
+        "tool_calls": defaultdict(
+            lambda: {
+                "function": {"arguments": "", "name": ""},
+                "id": "",
+                "type": "",
+            }
+        ),
+    }
+
+def stream_deltas(kind: str, fragments: int, fragment_size: int) -> List[Dict]:
+    """Deltas as run_and_stream sees them: plain dicts with role removed."""
+    text = "x" * (fragments * fragment_size)
+    if kind == "content":
+        payloads = chunk_payloads(content=text, fragment_size=fragment_size)
+    else:
+        tool_calls = [{
+            "id": "call_0",
+            "type": "function",
+            "function": {"name": "code_tool", "arguments": json.dumps({"code": text})},
+        }]
+        payloads = chunk_payloads(tool_calls=tool_calls, fragment_size=fragment_size)
+    deltas = []
+    for payload in payloads:
+        delta = model_to_dict(ChatCompletionChunk.model_validate(payload).choices[0].delta)
+        delta.pop("role", None)
+        deltas.append(delta)
+    return deltas
+
+def finalize(message: Dict) -> Dict:
+    message["tool_calls"] = list(message["tool_calls"].values()) or None
+    return message
+
+def with_merge_chunk(deltas: List[Dict]) -> Dict:
+    message = new_message()
+    for delta in deltas:
+        merge_chunk(message, delta)
+    return finalize(message)
+
+def with_accumulator(deltas: List[Dict]) -> Dict:
+    message = new_message()
+    accumulator = StreamAccumulator()
+    for delta in deltas:
+        accumulator.add(delta)
+    return finalize(accumulator.merge_into(message))
+
+def best_time(func, deltas: List[Dict], repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        # merge_chunk pops from the deltas, so each run gets fresh copies
+        fresh = copy.deepcopy(deltas)
+        start = time.perf_counter()
+        func(fresh)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_stream(kind: str, fragments: int, fragment_size: int, repeat: int) -> Dict:
+    deltas = stream_deltas(kind, fragments, fragment_size)
+    if with_merge_chunk(copy.deepcopy(deltas)) != with_accumulator(copy.deepcopy(deltas)):
+        raise AssertionError(f"StreamAccumulator output differs from merge_chunk for {kind}")
+    baseline = best_time(with_merge_chunk, deltas, repeat)
+    accumulated = best_time(with_accumulator, deltas, repeat)
+    return {
+        "kind": kind,
+        "deltas": len(deltas),
+        "fragment_size": fragment_size,
+        "merge_chunk_s": baseline,
+        "accumulator_s": accumulated,
+        "speedup": baseline / accumulated if accumulated else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streamed message accumulation")
+    parser.add_argument("--lengths", type=int, nargs="+", default=DEFAULT_STREAM_LENGTHS,
+                        help="Number of deltas per stream")
+    parser.add_argument("--fragment-size", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    results = [
+        bench_stream(kind, length, args.fragment_size, args.repeat)
+        for kind in ("content", "tool_arguments")
+        for length in args.lengths
+    ]
+    report = {
+        "benchmark": "stream_accumulation",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Measure how much time and memory Swarm's own turn loop costs.
+
+Drives Swarm.run and Swarm.run_and_stream against an in-process fake client
+across conversation lengths, tool counts and payload sizes, and reports
+per-turn framework overhead (wall time minus client and tool time),
+allocations and throughput as JSON.
+
+    python -m scripts.benchmarks.swarm_overhead --output bench.json
+    python -m scripts.benchmarks.swarm_overhead --compare bench.json
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from src.agents.swarm import Agent, Swarm
+from .fake_client import FakeChatClient, make_tools
+
+DEFAULT_TURNS = [1, 4, 16]
+DEFAULT_TOOL_COUNTS = [1, 7, 32]
+DEFAULT_PAYLOAD_SIZES = [100, 10_000]
+MODES = ["run", "stream"]
+
+def timed_tools(tools, timings: Dict[str, float]):
+    """Wrap tools so the time spent inside them can be excluded."""
+    def wrap(tool):
+        def wrapper(query: str, limit: int = 10) -> str:
+            start = time.perf_counter()
+            try:
+                return tool(query, limit)
+            finally:
+                timings["tool_time"] += time.perf_counter() - start
+        wrapper.__name__ = tool.__name__
+        wrapper.__doc__ = tool.__doc__
+        return wrapper
+    return [wrap(tool) for tool in tools]
+
+def run_conversation(swarm: Swarm, agent: Agent, mode: str, messages: List[Dict]):
+    if mode == "run":
+        return swarm.run(agent=agent, messages=messages)
+    for event in swarm.run(agent=agent, messages=messages, stream=True):
+        if "response" in event:
+            return event["response"]
+
+def bench_scenario(mode: str, turns: int, tool_count: int, payload_size: int, repeat: int) -> Dict:
+    timings = {"tool_time": 0.0}
+    tools = timed_tools(make_tools(tool_count, payload_size), timings)
+    agent = Agent(name="Bench", functions=tools)
+    client = FakeChatClient([tool.__name__ for tool in tools], turns, payload_size)
+    swarm = Swarm(client=client)
+    messages = [{"role": "user", "content": "u" * payload_size}]
+
+    # Warm up caches (schemas, pydantic validators) outside the measurement
+    run_conversation(swarm, agent, mode, messages)
+
+    samples = []
+    for _ in range(repeat):
+        client.client_time = 0.0
+        timings["tool_time"] = 0.0
+        start = time.perf_counter()
+        run_conversation(swarm, agent, mode, messages)
+        wall = time.perf_counter() - start
+        samples.append({
+            "wall": wall,
+            "client": client.client_time,
+            "tool": timings["tool_time"],
+            "framework": wall - client.client_time - timings["tool_time"],
+        })
+
+    tracemalloc.start()
+    run_conversation(swarm, agent, mode, messages)
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    completions = turns + 1
+    framework = statistics.median(sample["framework"] for sample in samples)
+    wall = statistics.median(sample["wall"] for sample in samples)
+    return {
+        "mode": mode,
+        "turns": turns,
+        "tools": tool_count,
+        "payload_size": payload_size,
+        "repeat": repeat,
+        "wall_s": wall,
+        "client_s": statistics.median(sample["client"] for sample in samples),
+        "tool_s": statistics.median(sample["tool"] for sample in samples),
+        "framework_s": framework,
+        "framework_per_turn_s": framework / completions,
+        "conversations_per_s": 1 / wall if wall else None,
+        "turns_per_s": completions / wall if wall else None,
+        "alloc_retained_bytes": allocated,
+        "alloc_peak_bytes": peak,
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+def scenario_key(result: Dict) -> tuple:
+    return (result["mode"], result["turns"], result["tools"], result["payload_size"])
+
+def compare(results: List[Dict], baseline_path: str, threshold: float) -> bool:
+    """Print per-scenario overhead ratios against a baseline; False on regression."""
+    with open(baseline_path) as f:
+        baseline = {scenario_key(result): result for result in json.load(f)["results"]}
+    ok = True
+    for result in results:
+        base = baseline.get(scenario_key(result))
+        if not base or not base["framework_per_turn_s"]:
+            continue
+        ratio = result["framework_per_turn_s"] / base["framework_per_turn_s"]
+        flag = "REGRESSION" if ratio > threshold else ""
+        ok = ok and ratio <= threshold
+        print(f"{result['mode']:6} turns={result['turns']:<3} tools={result['tools']:<3} "
+              f"payload={result['payload_size']:<6} x{ratio:.2f} {flag}", file=sys.stderr)
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Swarm framework overhead")
+    parser.add_argument("--turns", type=int, nargs="+", default=DEFAULT_TURNS)
+    parser.add_argument("--tools", type=int, nargs="+", default=DEFAULT_TOOL_COUNTS)
+    parser.add_argument("--payload-sizes", type=int, nargs="+", default=DEFAULT_PAYLOAD_SIZES)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against an earlier JSON report")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Overhead ratio over the baseline counted as a regression (default: 1.2)")
+    args = parser.parse_args()
+
+    results = [
+        bench_scenario(mode, turns, tool_count, payload_size, args.repeat)
+        for mode, turns, tool_count, payload_size in itertools.product(
+            args.modes, args.turns, args.tools, args.payload_sizes
+        )
+    ]
+    report = {
+        "benchmark": "swarm_overhead",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
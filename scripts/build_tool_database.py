@@ -0,0 +1,21 @@
+import argparse
+
+from src.tools.sql_engine import DATABASE_PATH, DATABASE_ROWS, DATABASE_SEED, build_database
+
+def main():
+    # database_tool builds its SQLite file on first use; large datasets are
+    # better built once up front so the first experiment is not slowed down
+    parser = argparse.ArgumentParser(description="Build the SQLite users table behind database_tool")
+    parser.add_argument("--rows", type=int, default=DATABASE_ROWS)
+    parser.add_argument("--seed", type=int, default=DATABASE_SEED)
+    parser.add_argument("--path", default=DATABASE_PATH)
+    parser.add_argument("--force", action="store_true", help="Rebuild even if a matching file exists")
+    args = parser.parse_args()
+
+    if build_database(args.path, args.rows, args.seed, force=args.force):
+        print(f"Built {args.rows} users in {args.path}")
+    else:
+        print(f"{args.path} already holds {args.rows} users for seed {args.seed}")
+
+if __name__ == "__main__":
+    main()
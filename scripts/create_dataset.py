@@ -2,7 +2,7 @@ from math import ceil
 from dotenv import load_dotenv
 import pandas as pd
 from langchain_openai import ChatOpenAI
-from src.database.connection import get_connection
+from src.database.connection import pooled_connection
 from .tool_selection.models import SimpleCache
 from .tool_selection.prompts import create_prompt_template
 from .tool_selection.generator import generate_examples
@@ -17,41 +17,36 @@ RUNS = ceil(NUMBER_OF_PROMPTS / SAMPLES_PER_RUN)
 
 def save_to_database(synthetic_data):
     """Save the generated data to PostgreSQL database."""
-    conn, cur = get_connection()
     try:
-        # Prepare the insert query
-        insert_query = """
-            INSERT INTO prompts (prompt, prompt_category, correct_tools, tools_available)
-            VALUES (%s, %s, %s, %s)
-        """
+        with pooled_connection() as (conn, cur):
+            # Prepare the insert query
+            insert_query = """
+                INSERT INTO prompts (prompt, prompt_category, correct_tools, tools_available)
+                VALUES (%s, %s, %s, %s)
+            """
 
-        # Insert each record
-        for item in synthetic_data:
-            # Convert the tools list to a proper PostgreSQL array format
-            correct_tools = item['correct_tools']
-            if isinstance(correct_tools, str):
-                correct_tools = [correct_tools]
-                
-            # Format arrays properly for PostgreSQL
-            correct_tools_array = '{' + ','.join(tool.strip('"') for tool in correct_tools) + '}'
-            tools_available_array = '{' + ','.join(DEFAULT_TOOLS) + '}'
+            # Insert each record
+            for item in synthetic_data:
+                # Convert the tools list to a proper PostgreSQL array format
+                correct_tools = item['correct_tools']
+                if isinstance(correct_tools, str):
+                    correct_tools = [correct_tools]
+                    
+                # Format arrays properly for PostgreSQL
+                correct_tools_array = '{' + ','.join(tool.strip('"') for tool in correct_tools) + '}'
+                tools_available_array = '{' + ','.join(DEFAULT_TOOLS) + '}'
 
-            cur.execute(insert_query, (
-                item['prompt'],
-                item['prompt_category'],
-                correct_tools_array,
-                tools_available_array
-            ))
+                cur.execute(insert_query, (
+                    item['prompt'],
+                    item['prompt_category'],
+                    correct_tools_array,
+                    tools_available_array
+                ))
         
-        conn.commit()
         print(f"Successfully saved {len(synthetic_data)} records to database")
     
     except Exception as e:
-        conn.rollback()
         print(f"Error saving to database: {str(e)}")
-    finally:
-        cur.close()
-        conn.close()
 
 def main():
     # Create cache instance
@@ -0,0 +1,19 @@
+import argparse
+import json
+
+def main():
+    # Wrap the JSONL written by src.utils.tracing into the JSON object format
+    # that Perfetto (ui.perfetto.dev) and chrome://tracing open directly
+    parser = argparse.ArgumentParser(description="Convert a TRACE_FILE to a Chrome trace JSON file")
+    parser.add_argument("trace_file", help="JSONL trace written while TRACE_FILE was set")
+    parser.add_argument("output", help="Path of the .json file to write")
+    args = parser.parse_args()
+
+    with open(args.trace_file) as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    with open(args.output, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    print(f"Wrote {len(events)} spans to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,8 @@
-import psycopg2
 import tqdm
 
-def main():
-    conn = psycopg2.connect(
-        host="localhost",
-        dbname="postgres",
-        user="postgres",
-        password="postgres",
-        port=5432,
-    )
-
-    cursor = conn.cursor()
+from src.database.connection import pooled_connection
 
+def main():
     # Split the SQL commands and execute them individually
     sql_commands = [
         "DROP TABLE IF EXISTS results CASCADE;",
@@ -50,18 +41,26 @@ def main():
             success_rate BOOLEAN,
             error_type TEXT,
             created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            cached_tokens INTEGER,
+            model_calls INTEGER,
+            wall_time FLOAT,
+            first_token_time FLOAT,
+            model_time FLOAT,
+            tool_time FLOAT,
+            framework_time FLOAT,
+            turn_timings JSONB,
             FOREIGN KEY (prompt_id) REFERENCES prompts(id),
-            FOREIGN KEY (test_run_id) REFERENCES test_runs(id)
+            FOREIGN KEY (test_run_id) REFERENCES test_runs(id),
+            UNIQUE (test_run_id, prompt_id)
         );
         """
     ]
 
-    for command in tqdm.tqdm(sql_commands):
-        cursor.execute(command)
-
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with pooled_connection() as (conn, cursor):
+        for command in tqdm.tqdm(sql_commands):
+            cursor.execute(command)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
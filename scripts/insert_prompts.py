@@ -1,7 +1,7 @@
 import json
 import psycopg2
 
-from src.database.connection import close_connection, get_connection
+from src.database.connection import pooled_connection
 from src.tools import DEFAULT_TOOLS
 
 def insert_prompts(json_file_path: str) -> None:
@@ -26,25 +26,22 @@ def insert_prompts(json_file_path: str) -> None:
             data = json.load(file)
         
         # Connect to database
-        conn, cursor = get_connection()
+        with pooled_connection() as (conn, cursor):
+            # Insert each prompt
+            for prompt_data in data['prompts']:
+                # Use default tools if tools_available is not provided
+                tools_available = prompt_data.get('tools_available', DEFAULT_TOOLS)
+                
+                cursor.execute("""
+                    INSERT INTO prompts (prompt, prompt_category, correct_tool, tools_available)
+                    VALUES (%s, %s, %s, %s)
+                """, (
+                    prompt_data['prompt'],
+                    prompt_data['prompt_category'],
+                    prompt_data['correct_tool'],
+                    tools_available
+                ))
         
-        # Insert each prompt
-        for prompt_data in data['prompts']:
-            # Use default tools if tools_available is not provided
-            tools_available = prompt_data.get('tools_available', DEFAULT_TOOLS)
-            
-            cursor.execute("""
-                INSERT INTO prompts (prompt, prompt_category, correct_tool, tools_available)
-                VALUES (%s, %s, %s, %s)
-            """, (
-                prompt_data['prompt'],
-                prompt_data['prompt_category'],
-                prompt_data['correct_tool'],
-                tools_available
-            ))
-        
-        # Commit the transaction
-        conn.commit()
         print(f"Successfully inserted {len(data['prompts'])} prompts into the database.")
         
     except json.JSONDecodeError as e:
@@ -53,8 +50,6 @@ def insert_prompts(json_file_path: str) -> None:
         print(f"Database error: {e}")
     except Exception as e:
         print(f"An error occurred: {e}")
-    finally:
-        close_connection(conn, cursor)
 
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,36 @@
+import tqdm
+
+from src.database.connection import pooled_connection
+
+def main():
+    # Bring a database created by an older initialize_database up to date.
+    # Every command is idempotent, so this is safe to run more than once.
+    sql_commands = [
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS results_test_run_id_prompt_id_key
+        ON results (test_run_id, prompt_id);
+        """,
+        """
+        ALTER TABLE results
+            ADD COLUMN IF NOT EXISTS prompt_tokens INTEGER,
+            ADD COLUMN IF NOT EXISTS completion_tokens INTEGER,
+            ADD COLUMN IF NOT EXISTS cached_tokens INTEGER,
+            ADD COLUMN IF NOT EXISTS model_calls INTEGER;
+        """,
+        """
+        ALTER TABLE results
+            ADD COLUMN IF NOT EXISTS wall_time FLOAT,
+            ADD COLUMN IF NOT EXISTS first_token_time FLOAT,
+            ADD COLUMN IF NOT EXISTS model_time FLOAT,
+            ADD COLUMN IF NOT EXISTS tool_time FLOAT,
+            ADD COLUMN IF NOT EXISTS framework_time FLOAT,
+            ADD COLUMN IF NOT EXISTS turn_timings JSONB;
+        """,
+    ]
+
+    with pooled_connection() as (conn, cursor):
+        for command in tqdm.tqdm(sql_commands):
+            cursor.execute(command)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from src.agents import swarm_response
 from src.tools import summary_tool, search_web_tool, task_management_tool, code_tool, database_tool, calendar_tool, statistical_analysis_tool
 from src.tools.schemas import SearchWebToolParams, TaskManagmentToolParams, CodeToolParams, DatabaseToolParams, StatisticalAnalysisToolParams
 from src.utils.tracking import ToolTracker
-from src.database.queries import get_all_prompts
-from src.database.connection import get_connection
+from src.database.queries import get_all_prompts, get_completed_prompt_ids, get_latency_percentiles, get_test_run
+from src.database.connection import pooled_connection
+from src.database.result_sink import ResultSink
 from src.tools import DEFAULT_TOOLS
 import json
 
@@ -64,37 +68,169 @@ def print_tool_summary(call: dict):
 
 def create_test_run(model_name: str, instructions: str, agent_type: str) -> int:
     """Create a new test run and return its ID"""
-    conn, cur = get_connection()
-    try:
+    with pooled_connection() as (conn, cur):
         cur.execute("""
             INSERT INTO test_runs (model_name, instructions, started_at, configuration, agent_type)
             VALUES (%s, %s, %s, %s::jsonb, %s)
             RETURNING id;
         """, (model_name, instructions, datetime.now(), json.dumps({}), agent_type))
-        test_run_id = cur.fetchone()[0]
-        conn.commit()
-        return test_run_id
-    finally:
-        cur.close()
-        conn.close()
+        return cur.fetchone()[0]
+
+def latency_breakdown(scope, wall_time: float) -> dict:
+    """Split a prompt's wall time into model, tool and framework time.
+
+    Framework time is everything not spent waiting on the model or running
+    tools, including work outside the agent's turns.
+    """
+    totals = scope.timing_totals()
+    if not scope.turns:
+        # The agent reported no turns; only the tool tracker's durations are known
+        totals["tool_time"] = sum(call['duration'] for call in scope.tool_calls)
+    return {
+        "wall_time": wall_time,
+        "first_token_time": totals["first_token_time"],
+        "model_time": totals["model_time"],
+        "tool_time": totals["tool_time"],
+        "framework_time": max(wall_time - totals["model_time"] - totals["tool_time"], 0.0),
+        "turns": scope.turns,
+    }
+
+def evaluate_prompt(prompt: dict, agent_function, model: str, available_tools: list, instructions: str) -> dict:
+    """Run a single prompt through the agent and collect its tool and token usage.
+
+    Safe to call from several worker threads at once: tool calls are
+    recorded into a tracking scope opened for this prompt only.
+    """
+    with ToolTracker().scope() as scope:
+        started = time.perf_counter()
+        try:
+            response = agent_function(prompt['prompt'], model, available_tools, instructions)
+        except Exception as e:
+            return {
+                "prompt": prompt,
+                "response": None,
+                "tool_calls": [],
+                "usage": scope.usage_totals(),
+                "timings": latency_breakdown(scope, time.perf_counter() - started),
+                "success": False,
+                "total_time": 0,
+                "error": str(e),
+            }
+        wall_time = time.perf_counter() - started
+
+    tool_calls = scope.tool_calls
+    tools_used = [call['tool_name'] for call in tool_calls]
+    return {
+        "prompt": prompt,
+        "response": response,
+        "tool_calls": tool_calls,
+        "usage": scope.usage_totals(),
+        "timings": latency_breakdown(scope, wall_time),
+        "success": all(tool in tools_used for tool in prompt['correct_tools']),
+        "total_time": sum(call['duration'] for call in tool_calls),
+        "error": None,
+    }
+
+def report_result(index: int, total_prompts: int, outcome: dict):
+    """Print the outcome of a single prompt execution"""
+    prompt = outcome['prompt']
+    print_header(f"Prompt {index}/{total_prompts}", "•")
+    print("📋 Prompt:")
+    print(f"{prompt['prompt']}\n")
+
+    if outcome['error'] is not None:
+        print("\n❌ Error:")
+        print(f"{outcome['error']}")
+        print_header("Error Details", "!")
+        print(f"❌ Error processing prompt {prompt['id']}:")
+        print(f"{outcome['error']}")
+        return
+
+    print("🤖 Response:")
+    print(f"{outcome['response']}\n")
+
+    tool_calls = outcome['tool_calls']
+    print_header("Tool Usage Summary", "-")
+    for call in tool_calls:
+        print_tool_summary(call)
+
+    print(f"✨ Success: {'✅ Yes' if outcome['success'] else '❌ No'}")
+    print(f"⏱️  Total Time: {outcome['total_time']:.3f}s")
+    timings = outcome['timings']
+    print(f"⏱️  Wall Time: {timings['wall_time']:.3f}s (model {timings['model_time']:.3f}s, "
+          f"tools {timings['tool_time']:.3f}s, framework {timings['framework_time']:.3f}s)")
+    usage = outcome['usage']
+    print(f"🪙 Tokens: {usage['prompt_tokens']} prompt ({usage['cached_tokens']} cached), "
+          f"{usage['completion_tokens']} completion over {usage['completions']} model calls")
+    print(f"🎯 Expected Tools: {', '.join(prompt['correct_tools'])}")
+    print(f"🔧 Used Tools: {', '.join(call['tool_name'] for call in tool_calls)}")
 
-def save_result(prompt_id: int, test_run_id: int, tool_calls: list, time_taken: float, success_rate: bool, error_type: str = None):
-    """Save the result of a prompt execution"""
-    conn, cur = get_connection()
+def print_latency_summary(test_run_id: int):
+    """Print p50/p95/p99 of the latency metrics stored for a test run"""
+    print_header("Latency (seconds)", "-")
+    print(f"{'metric':<18}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for metric, stats in get_latency_percentiles(test_run_id).items():
+        cells = "".join(
+            f"{stats[p]:>10.3f}" if stats[p] is not None else f"{'-':>10}"
+            for p in ("p50", "p95", "p99")
+        )
+        print(f"{metric:<18}{cells}")
+
+def run_prompts(prompts: list, agent_function, model: str, available_tools: list, instructions: str, workers: int = 1):
+    """Evaluate prompts, yielding (index, outcome) pairs as they finish.
+
+    With a single worker prompts are processed in order on the calling thread.
+    With more workers up to `workers` prompts are in flight at once and
+    outcomes are yielded in completion order; each outcome carries its prompt.
+    If the caller stops early (Ctrl-C, an error, or closing the generator),
+    prompts not yet started are cancelled rather than evaluated.
+    """
+    if workers <= 1:
+        for index, prompt in enumerate(prompts, 1):
+            yield index, evaluate_prompt(prompt, agent_function, model, available_tools, instructions)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prompt-worker")
     try:
-        cur.execute("""
-            INSERT INTO results 
-            (prompt_id, test_run_id, tool_calls, time_taken, success_rate, error_type, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (prompt_id, test_run_id, tool_calls, time_taken, success_rate, error_type, datetime.now()))
-        conn.commit()
+        futures = {
+            executor.submit(evaluate_prompt, prompt, agent_function, model, available_tools, instructions): index
+            for index, prompt in enumerate(prompts, 1)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
     finally:
-        cur.close()
-        conn.close()
+        # Only the prompts already running are waited for
+        executor.shutdown(wait=True, cancel_futures=True)
 
-def main():
-    tracker = ToolTracker()
-    
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the tool selection experiments")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of prompts to evaluate concurrently (default: 1, sequential)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=50,
+        help="Number of results buffered before they are written to the database (default: 50)",
+    )
+    parser.add_argument(
+        "--flush-interval",
+        type=float,
+        default=5.0,
+        help="Maximum seconds between result writes (default: 5)",
+    )
+    parser.add_argument(
+        "--resume",
+        type=int,
+        metavar="TEST_RUN_ID",
+        help="Resume an existing test run, skipping prompts that already have a result",
+    )
+    return parser.parse_args()
+
+def main(workers: int = 1, batch_size: int = 50, flush_interval: float = 5.0, resume: int = None):
     agent_function = swarm_response
     MODEL = "gpt-4o-mini"
     INSTRUCTIONS = """You are a helpful AI assistant."""
@@ -152,79 +288,65 @@ def main():
     # TODO: Add other agent types
     AGENT_TYPE = agent_function.__name__.split('_')[0]
 
-    # Create a new test run
-    test_run_id = create_test_run(MODEL, INSTRUCTIONS, AGENT_TYPE)
-    print_header(f"Test Run ID: {test_run_id}")
-
     # Get all prompts from database
     prompts = get_all_prompts()
-    total_prompts = len(prompts)
-    print_header(f"Processing {total_prompts} Prompts", "-")
 
-    # Process each prompt
-    for index, prompt in enumerate(prompts, 1):
+    if resume is None:
+        # Create a new test run
+        test_run_id = create_test_run(MODEL, INSTRUCTIONS, AGENT_TYPE)
+        print_header(f"Test Run ID: {test_run_id}")
+    else:
+        test_run = get_test_run(resume)
+        if test_run is None:
+            raise SystemExit(f"Test run {resume} does not exist")
+        if (test_run['model_name'], test_run['instructions'], test_run['agent_type']) != (MODEL, INSTRUCTIONS, AGENT_TYPE):
+            print("⚠️  Model, instructions or agent type differ from the original test run")
+        test_run_id = test_run['id']
+        completed = get_completed_prompt_ids(test_run_id)
+        prompts = [prompt for prompt in prompts if prompt['id'] not in completed]
+        print_header(f"Resuming Test Run ID: {test_run_id} ({len(completed)} prompts already done)")
 
-        print_header(f"Prompt {index}/{total_prompts}", "•")
-        print("📋 Prompt:")
-        print(f"{prompt['prompt']}\n")
-        
-        try:
-            tracker.clear()
-            response = agent_function(prompt['prompt'], MODEL, AVAILABLE_TOOLS, INSTRUCTIONS)
-            
-            print("🤖 Response:")
-            print(f"{response}\n")
-            
-            tool_calls = tracker.get_tool_calls()
-            correct_tools = prompt['correct_tools']
-            tools_used = [call['tool_name'] for call in tool_calls]
-            success = all(tool in tools_used for tool in correct_tools)
-            total_time = sum(call['duration'] for call in tool_calls)
-            
-            print_header("Tool Usage Summary", "-")
-            for call in tool_calls:
-                print_tool_summary(call)
-                
-            print(f"✨ Success: {'✅ Yes' if success else '❌ No'}")
-            print(f"⏱️  Total Time: {total_time:.3f}s")
-            print(f"🎯 Expected Tools: {', '.join(correct_tools)}")
-            print(f"🔧 Used Tools: {', '.join(tools_used)}")
-
-            save_result(
-                prompt_id=prompt['id'],
-                test_run_id=test_run_id,
-                tool_calls=[call['tool_name'] for call in tool_calls],
-                time_taken=total_time,
-                success_rate=success
-            )
+    total_prompts = len(prompts)
+    print_header(f"Processing {total_prompts} Prompts ({workers} worker{'s' if workers != 1 else ''})", "-")
 
-        except Exception as e:
-            print("\n❌ Error:")
-            print(f"{str(e)}")
-            print_header("Error Details", "!")
-            print(f"❌ Error processing prompt {prompt['id']}:")
-            print(f"{str(e)}")
-            save_result(
-                prompt_id=prompt['id'],
+    # Process each prompt, writing results in batches off the evaluation loop
+    with ResultSink(batch_size=batch_size, flush_interval=flush_interval) as sink:
+        for index, outcome in run_prompts(prompts, agent_function, MODEL, AVAILABLE_TOOLS, INSTRUCTIONS, workers):
+            report_result(index, total_prompts, outcome)
+            sink.add(
+                prompt_id=outcome['prompt']['id'],
                 test_run_id=test_run_id,
-                tool_calls=[],
-                time_taken=0,
-                success_rate=False,
-                error_type=str(e)
+                tool_calls=[call['tool_name'] for call in outcome['tool_calls']],
+                time_taken=outcome['total_time'],
+                success_rate=outcome['success'],
+                error_type=outcome['error'],
+                prompt_tokens=outcome['usage']['prompt_tokens'],
+                completion_tokens=outcome['usage']['completion_tokens'],
+                cached_tokens=outcome['usage']['cached_tokens'],
+                model_calls=outcome['usage']['completions'],
+                wall_time=outcome['timings']['wall_time'],
+                first_token_time=outcome['timings']['first_token_time'],
+                model_time=outcome['timings']['model_time'],
+                tool_time=outcome['timings']['tool_time'],
+                framework_time=outcome['timings']['framework_time'],
+                turn_timings=outcome['timings']['turns'],
             )
 
     # Update test run completion
-    conn, cur = get_connection()
-    try:
+    with pooled_connection() as (conn, cur):
         cur.execute("""
             UPDATE test_runs 
             SET completed_at = %s 
             WHERE id = %s
         """, (datetime.now(), test_run_id))
-        conn.commit()
-    finally:
-        cur.close()
-        conn.close()
+
+    print_latency_summary(test_run_id)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    main(
+        workers=args.workers,
+        batch_size=args.batch_size,
+        flush_interval=args.flush_interval,
+        resume=args.resume,
+    )
\ No newline at end of file
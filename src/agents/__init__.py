@@ -1,3 +1,3 @@
-from .swarm.agent import swarm_response
+from .swarm.agent import async_swarm_response, swarm_response
 
-__all__ = ["swarm_response"]
+__all__ = ["async_swarm_response", "swarm_response"]
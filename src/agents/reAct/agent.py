@@ -1,11 +1,19 @@
+import asyncio
 import logging
-from typing import List, Dict, Any
+import threading
+import time
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
 from langchain_openai import ChatOpenAI
 from langchain_core.tools import StructuredTool
 from langchain_core.messages import HumanMessage
 from langgraph.prebuilt import create_react_agent
 from langchain_core.messages import SystemMessage
+from langchain_core.callbacks import BaseCallbackHandler
 from dotenv import load_dotenv
+from src.agents.swarm.replay import replay_client_from_env
+from src.utils.tracking import ToolTracker
+from src.utils.tracing import NOOP_SPAN, span, start_span
 
 # Configure logging
 logging.basicConfig(level=logging.ERROR)
@@ -13,6 +21,223 @@ logging.basicConfig(level=logging.ERROR)
 # Load environment variables
 load_dotenv()
 
+INCOMPLETE_RESPONSE = "I apologize, but I couldn't generate a complete response."
+ERROR_RESPONSE = "I apologize, but an error occurred while processing your request. Please try again."
+
+def replay_llm_clients() -> Dict[str, Any]:
+    """ChatOpenAI client overrides for the record/replay cache, if enabled."""
+    replay_client = replay_client_from_env()
+    if replay_client is None:
+        return {}
+    return {
+        "client": replay_client.chat.completions,
+        "async_client": replay_client_from_env(async_client=True).chat.completions,
+    }
+
+@lru_cache(maxsize=8)
+def get_llm(model: str) -> ChatOpenAI:
+    """
+    Shared ChatOpenAI client per model.
+
+    Reusing the client keeps its HTTP connection pool, and so keep-alive
+    connections, across prompts. Completions are streamed even though the
+    graph only uses whole messages, so TurnTimingHandler sees the first
+    token arrive and the turn's TTFT is measured rather than its model time.
+    """
+    return ChatOpenAI(
+        model=model,
+        temperature=0,
+        streaming=True,
+        stream_usage=True,
+        **replay_llm_clients()
+    )
+
+def tool_set(available_tools: List[Dict[str, Any]]) -> Tuple[tuple, ...]:
+    """Hashable description of the enabled tools, used as a cache key."""
+    return tuple(
+        (tool["name"], tool["description"], tool["function"], tool.get("schema", None))
+        for tool in available_tools
+        if tool.get("enabled", True)
+    )
+
+@lru_cache(maxsize=32)
+def compile_agent(model: str, tools: Tuple[tuple, ...], instructions: str):
+    """
+    Build the ReAct agent graph for a model, tool set and instructions once.
+
+    The compiled graph holds no per-run state, so it is shared by every
+    prompt (and thread) with the same configuration.
+    """
+    # Convert the tools to LangChain StructuredTool format
+    structured_tools = [
+        StructuredTool(
+            name=name.replace("_tool", ""),
+            description=description,
+            func=function,
+            args_schema=schema
+        )
+        for name, description, function, schema in tools
+    ]
+
+    return create_react_agent(
+        get_llm(model),
+        structured_tools,
+        state_modifier=SystemMessage(content=instructions)
+    )
+
+def agent_message_content(chunk: Dict[str, Any], model: str):
+    """Record the usage of an agent update and return its last message's content."""
+    if "agent" not in chunk or "messages" not in chunk["agent"]:
+        return None
+    messages = chunk["agent"]["messages"]
+    for message in messages:
+        record_usage(message, model)
+    if messages and hasattr(messages[-1], "content"):
+        return messages[-1].content
+    return None
+
+def record_usage(message, model: str) -> None:
+    """Add the token usage of one LangChain AI message to the tracking scope."""
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return
+    ToolTracker().add_usage(
+        model=message.response_metadata.get("model_name", model),
+        prompt_tokens=usage.get("input_tokens", 0),
+        completion_tokens=usage.get("output_tokens", 0),
+        cached_tokens=usage.get("input_token_details", {}).get("cache_read", 0),
+    )
+
+def completion_attributes(response) -> Dict[str, Any]:
+    """Model and token counts of a LangChain LLMResult, for a completion span."""
+    llm_output = response.llm_output or {}
+    usage = llm_output.get("token_usage") or {}
+    if usage:
+        return {
+            "model": llm_output.get("model_name"),
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+        }
+    # Streamed completions leave llm_output empty; the message carries the usage
+    generations = response.generations[0] if response.generations else []
+    message = getattr(generations[0], "message", None) if generations else None
+    usage = getattr(message, "usage_metadata", None) or {}
+    return {
+        "model": message.response_metadata.get("model_name") if message else None,
+        "prompt_tokens": usage.get("input_tokens"),
+        "completion_tokens": usage.get("output_tokens"),
+    }
+
+class TurnTimingHandler(BaseCallbackHandler):
+    """
+    Builds the per-turn latency breakdown of a ReAct run from LangChain callbacks.
+
+    A turn starts when a chat model call starts and ends when the next one
+    does (or the run finishes). Tool time is the span from the first tool
+    start to the last tool end in the turn, so tools the graph runs in
+    parallel are not double counted.
+
+    When tracing is on, turns, completions and tool calls are also recorded
+    as spans under `parent`.
+    """
+
+    def __init__(self, parent=NOOP_SPAN):
+        self.parent = parent
+        self._lock = threading.Lock()
+        self._turns: List[Dict[str, Any]] = []
+        self._model_turns: Dict[Any, Dict[str, Any]] = {}
+        self._tool_spans: Dict[Any, Any] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        now = time.perf_counter()
+        with self._lock:
+            if self._turns:
+                self._close_turn(self._turns[-1], now)
+            turn_span = start_span("react.turn", parent=self.parent, turn=len(self._turns))
+            turn = {"started": now, "first_token": None,
+                    "model_end": None, "tool_start": None, "tool_end": None,
+                    "timing": None, "span": turn_span,
+                    "completion_span": start_span(
+                        "chat.completion", parent=turn_span,
+                        messages=sum(len(batch) for batch in messages),
+                    )}
+            self._turns.append(turn)
+            self._model_turns[run_id] = turn
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        with self._lock:
+            turn = self._model_turns.get(run_id)
+            if turn is not None and turn["first_token"] is None:
+                turn["first_token"] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            turn = self._model_turns.pop(run_id, None)
+            if turn is not None:
+                turn["model_end"] = time.perf_counter()
+                turn["completion_span"].end(**completion_attributes(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            turn = self._model_turns.pop(run_id, None)
+            if turn is not None:
+                turn["model_end"] = time.perf_counter()
+                turn["completion_span"].end(error=f"{type(error).__name__}: {error}")
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        now = time.perf_counter()
+        with self._lock:
+            if self._turns:
+                turn = self._turns[-1]
+                if turn["tool_start"] is None:
+                    turn["tool_start"] = now
+                self._tool_spans[run_id] = start_span(
+                    "react.tool_call", parent=turn["span"],
+                    tool=(serialized or {}).get("name"), args_bytes=len(input_str or ""),
+                )
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        now = time.perf_counter()
+        with self._lock:
+            if self._turns:
+                self._turns[-1]["tool_end"] = now
+            tool_span = self._tool_spans.pop(run_id, None)
+        if tool_span is not None:
+            tool_span.end(result_bytes=len(str(getattr(output, "content", output))))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        now = time.perf_counter()
+        with self._lock:
+            if self._turns:
+                self._turns[-1]["tool_end"] = now
+            tool_span = self._tool_spans.pop(run_id, None)
+        if tool_span is not None:
+            tool_span.end(error=f"{type(error).__name__}: {error}")
+
+    def _close_turn(self, turn: Dict[str, Any], ended: float) -> None:
+        turn_time = ended - turn["started"]
+        model_time = (turn["model_end"] or ended) - turn["started"]
+        tool_time = 0.0
+        if turn["tool_start"] is not None and turn["tool_end"] is not None:
+            tool_time = turn["tool_end"] - turn["tool_start"]
+        ttft = turn["first_token"] - turn["started"] if turn["first_token"] else model_time
+        turn["timing"] = {
+            "ttft": ttft,
+            "model_time": model_time,
+            "tool_time": tool_time,
+            "framework_time": max(turn_time - model_time - tool_time, 0.0),
+            "turn_time": turn_time,
+        }
+        turn["span"].end(**turn["timing"])
+
+    def finish(self) -> List[Dict[str, float]]:
+        """Close the last turn and return the breakdown of every turn in seconds."""
+        now = time.perf_counter()
+        with self._lock:
+            if self._turns and self._turns[-1]["timing"] is None:
+                self._close_turn(self._turns[-1], now)
+            return [turn["timing"] for turn in self._turns]
+
 def react_response(
     prompt: str,
     model: str,
@@ -32,51 +257,130 @@ def react_response(
         AI response as string
     """
     try:
-        # Initialize LLM
-        llm = ChatOpenAI(
-            model=model,
-            temperature=0
-        )
-        
-        # Convert available_tools to LangChain StructuredTool format
-        tools = [
-            StructuredTool(
-                name=tool["name"].replace("_tool", ""),
-                description=tool["description"],
-                func=tool["function"],
-                args_schema=tool.get("schema", None)
-            )
-            for tool in available_tools
-            if tool.get("enabled", True)
-        ]
-
-        # Create the agent
-        agent_executor = create_react_agent(
-            llm,
-            tools,
-            state_modifier=SystemMessage(content=instructions)
-        )
+        # Compiled once per (model, tools, instructions) and reused
+        agent_executor = compile_agent(model, tool_set(available_tools), instructions)
 
-        # Run the agent with a specific recursion limit
-        config = {"recursion_limit": 7}
-        
         final_response = None
         
         # Run the agent and capture the final response
-        for chunk in agent_executor.stream(
-            {"messages": [HumanMessage(content=prompt)]},
-            config=config
-        ):
-            if "agent" in chunk and "messages" in chunk["agent"]:
-                messages = chunk["agent"]["messages"]
-                if messages and hasattr(messages[-1], "content"):
-                    final_response = messages[-1].content
+        with span("react.run", model=model) as run_span:
+            # Run the agent with a specific recursion limit
+            timing = TurnTimingHandler(parent=run_span)
+            config = {"recursion_limit": 7, "callbacks": [timing]}
+
+            for chunk in agent_executor.stream(
+                {"messages": [HumanMessage(content=prompt)]},
+                config=config
+            ):
+                content = agent_message_content(chunk, model)
+                if content is not None:
+                    final_response = content
+
+            for turn in timing.finish():
+                ToolTracker().add_turn(**turn)
         
-        return final_response if final_response else "I apologize, but I couldn't generate a complete response."
+        return final_response if final_response else INCOMPLETE_RESPONSE
 
     except Exception as e:
         logging.error(f"Error in basic_response: {e}")
-        return "I apologize, but an error occurred while processing your request. Please try again."
+        return ERROR_RESPONSE
+
+async def async_react_response(
+    prompt: str,
+    model: str,
+    available_tools: List[Dict[str, Any]],
+    instructions: str
+) -> str:
+    """
+    Gets a response from the AI using the basic framework, without blocking.
+
+    Same contract as react_response, but drives the compiled graph with
+    `astream`, so many prompts can share one event loop. Tools still run on
+    LangChain's executor in a copy of the caller's context and record into
+    the active tracking scope.
+
+    Returns:
+        AI response as string
+    """
+    try:
+        agent_executor = compile_agent(model, tool_set(available_tools), instructions)
+
+        final_response = None
+
+        with span("react.run", model=model) as run_span:
+            timing = TurnTimingHandler(parent=run_span)
+            config = {"recursion_limit": 7, "callbacks": [timing]}
+
+            async for chunk in agent_executor.astream(
+                {"messages": [HumanMessage(content=prompt)]},
+                config=config
+            ):
+                content = agent_message_content(chunk, model)
+                if content is not None:
+                    final_response = content
+
+            for turn in timing.finish():
+                ToolTracker().add_turn(**turn)
+
+        return final_response if final_response else INCOMPLETE_RESPONSE
+
+    except Exception as e:
+        logging.error(f"Error in async_react_response: {e}")
+        return ERROR_RESPONSE
+
+async def async_react_response_batch(
+    prompts: List[str],
+    model: str,
+    available_tools: List[Dict[str, Any]],
+    instructions: str,
+    max_concurrency: int = 8
+) -> List[Dict[str, Any]]:
+    """
+    Run many prompts through one compiled ReAct agent concurrently.
+
+    At most `max_concurrency` prompts are in flight at once. Each prompt
+    runs in its own task and tracking scope, so tool calls, usage and turn
+    timings are never mixed between prompts.
+
+    Returns:
+        One dict per prompt, in input order, with the final `response` and
+        the prompt's `tool_calls`, `usage` totals and per-turn `turns`.
+    """
+    # Compile up front so concurrent tasks do not race to build the graph
+    compile_agent(model, tool_set(available_tools), instructions)
+    semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+
+    async def run_one(prompt: str) -> Dict[str, Any]:
+        async with semaphore:
+            with ToolTracker().scope() as scope:
+                response = await async_react_response(prompt, model, available_tools, instructions)
+            return {
+                "prompt": prompt,
+                "response": response,
+                "tool_calls": scope.tool_calls,
+                "usage": scope.usage_totals(),
+                "turns": scope.turns,
+            }
+
+    # gather keeps results in input order
+    return list(await asyncio.gather(*(run_one(prompt) for prompt in prompts)))
+
+def react_response_batch(
+    prompts: List[str],
+    model: str,
+    available_tools: List[Dict[str, Any]],
+    instructions: str,
+    max_concurrency: int = 8
+) -> List[Dict[str, Any]]:
+    """
+    Synchronous entry point for async_react_response_batch.
+
+    Starts its own event loop, so it must not be called from inside one;
+    await async_react_response_batch there instead.
+    """
+    return asyncio.run(async_react_response_batch(
+        prompts, model, available_tools, instructions, max_concurrency
+    ))
 
 if __name__ == "__main__":
     # Example usage
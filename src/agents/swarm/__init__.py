@@ -1,4 +1,5 @@
-from .core import Swarm
+from .context_window import ContextWindow
+from .core import AsyncSwarm, Swarm
 from .types import Agent, Response
 
-__all__ = ["Swarm", "Agent", "Response"]
+__all__ = ["AsyncSwarm", "ContextWindow", "Swarm", "Agent", "Response"]
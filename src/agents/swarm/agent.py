@@ -1,7 +1,10 @@
 import logging
 from typing import List, Dict, Any
-from .core import Swarm
-from .types import Agent
+from .context_window import context_window_from_env
+from .core import AsyncSwarm, Swarm
+from .replay import replay_client_from_env
+from .types import Agent, Response
+from src.utils.tracking import ToolTracker
 from dotenv import load_dotenv
 # Configure logging
 logging.basicConfig(level=logging.ERROR)
@@ -9,7 +12,72 @@ logging.basicConfig(level=logging.ERROR)
 # Load environment variables
 load_dotenv()
 
-client = Swarm()
+# SWARM_REPLAY_MODE puts a record/replay cache in front of the model and
+# SWARM_CONTEXT_TOKENS caps the prompt tokens sent per request
+client = Swarm(client=replay_client_from_env(), context_window=context_window_from_env())
+async_client = AsyncSwarm(
+    client=replay_client_from_env(async_client=True),
+    context_window=context_window_from_env(),
+)
+
+FALLBACK_RESPONSE = "I apologize, but I couldn't generate a response at this time. Please try again."
+ERROR_RESPONSE = "I apologize, but an error occurred while processing your request. Please try again."
+
+def build_agent(model: str, available_tools: List[Dict[str, Any]], instructions: str) -> Agent:
+    """Create the main agent with the enabled tools."""
+    return Agent(
+        name="AI Assistant",
+        instructions=instructions,
+        functions=[
+            tool["function"]
+            for tool in available_tools
+            if tool["enabled"]
+        ],
+        model=model,
+    )
+
+def final_assistant_message(response: Response) -> str:
+    """Return the content of the last assistant message of a Swarm response."""
+    if response is None or not response.messages:
+        logging.error("Invalid response from client.run")
+        return FALLBACK_RESPONSE
+
+    # Get the last assistant message
+    for message in reversed(response.messages):
+        if message.get("role") == "assistant" and message.get("content"):
+            return message["content"]
+
+    logging.error("No assistant message found in response")
+    return FALLBACK_RESPONSE
+
+def record_metrics(response: Response) -> None:
+    """Add the token usage and turn timings of a response to the tracking scope."""
+    if response is None:
+        return
+    tracker = ToolTracker()
+    for usage in response.usage:
+        tracker.add_usage(**usage)
+    for timing in response.timings:
+        tracker.add_turn(**timing)
+
+def run_streamed(**run_kwargs) -> Response:
+    """
+    Run the Swarm client with streaming and return the final Response.
+
+    Streaming lets each turn's timing record when the first token arrived,
+    so its TTFT is measured instead of falling back to the model time.
+    """
+    response = None
+    for event in client.run(stream=True, **run_kwargs):
+        response = event.get("response", response)
+    return response
+
+async def async_run_streamed(**run_kwargs) -> Response:
+    """Async counterpart of run_streamed."""
+    response = None
+    async for event in await async_client.run(stream=True, **run_kwargs):
+        response = event.get("response", response)
+    return response
 
 def swarm_response(
     prompt: str,
@@ -24,38 +92,47 @@ def swarm_response(
         AI response as string
     """
     try:
-        # Create main agent
-        main_agent = Agent(
-        name="AI Assistant",
-        instructions=instructions,
-        functions=[
-            tool["function"] 
-            for tool in available_tools 
-            if tool["enabled"]
-        ],
-        model=model,
-    )
-        
         # Get response from Swarm
-        response = client.run(
-            agent=main_agent,
+        response = run_streamed(
+            agent=build_agent(model, available_tools, instructions),
             messages=[{"role": "user", "content": prompt}],
             model_override=model,
         )
-        
-        if response is None or not response.messages:
-            logging.error("Invalid response from client.run")
-            return "I apologize, but I couldn't generate a response at this time. Please try again."
-
-        # Get the last assistant message
-        for message in reversed(response.messages):
-            if message.get("role") == "assistant" and message.get("content"):
-                return message["content"]
-        
-        logging.error("No assistant message found in response")
-        return "I apologize, but I couldn't generate a response at this time. Please try again."
-        
+        record_metrics(response)
+        return final_assistant_message(response)
+
     except Exception as e:
+        # Completions that finished before the failure were still paid for
+        record_metrics(getattr(e, "partial_response", None))
         logging.error(f"Error in swarm_response: {e}")
-        return "I apologize, but an error occurred while processing your request. Please try again."
-    
+        return ERROR_RESPONSE
+
+async def async_swarm_response(
+    prompt: str,
+    model: str,
+    available_tools: List[Dict[str, Any]],
+    instructions: str
+) -> str:
+    """
+    Gets a response from the AI using the asyncio-native Swarm framework.
+
+    Same contract as swarm_response, but awaitable, so many prompts can
+    share one event loop.
+
+    Returns:
+        AI response as string
+    """
+    try:
+        response = await async_run_streamed(
+            agent=build_agent(model, available_tools, instructions),
+            messages=[{"role": "user", "content": prompt}],
+            model_override=model,
+        )
+        record_metrics(response)
+        return final_assistant_message(response)
+
+    except Exception as e:
+        # Completions that finished before the failure were still paid for
+        record_metrics(getattr(e, "partial_response", None))
+        logging.error(f"Error in async_swarm_response: {e}")
+        return ERROR_RESPONSE
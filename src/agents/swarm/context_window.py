@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import tiktoken
+
+# Overheads from OpenAI's token counting guide for chat models: every message
+# is wrapped in a few formatting tokens and every reply is primed with three
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+DEFAULT_ENCODING = "o200k_base"
+# Rough characters per token, used only when no encoding can be loaded
+CHARS_PER_TOKEN = 4
+
+COMPACTED_TOOL_OUTPUT = "[Earlier {tool} output removed to save context ({tokens} tokens).]"
+
+
+@lru_cache(maxsize=32)
+def encoding_for(model: str):
+    """
+    Return the tiktoken encoding for a model, or None if it cannot be loaded.
+
+    Unknown models use DEFAULT_ENCODING. tiktoken downloads encodings on
+    first use, so without network access or a warm cache this falls back to
+    None and token counts become estimates.
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logging.warning(f"Could not load a tiktoken encoding for {model}, estimating token counts: {e}")
+        return None
+
+
+def count_text_tokens(text: str, encoding) -> int:
+    if not text:
+        return 0
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(message: dict, encoding) -> int:
+    """Approximate the prompt tokens one chat message costs."""
+    tokens = TOKENS_PER_MESSAGE
+    content = message.get("content")
+    if isinstance(content, str):
+        tokens += count_text_tokens(content, encoding)
+    elif content:
+        tokens += count_text_tokens(json.dumps(content), encoding)
+    for key in ("role", "name", "tool_call_id"):
+        if message.get(key):
+            tokens += count_text_tokens(message[key], encoding)
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call["function"]
+        tokens += TOKENS_PER_MESSAGE
+        tokens += count_text_tokens(function["name"], encoding)
+        tokens += count_text_tokens(function["arguments"], encoding)
+    return tokens
+
+
+def message_groups(messages: List[dict]) -> List[Tuple[int, int]]:
+    """
+    Split messages into (start, end) ranges that must be kept or dropped together.
+
+    An assistant message is grouped with the tool messages answering its
+    tool calls, so dropping a whole group never leaves a tool_call without
+    its result or a tool result without its call.
+    """
+    groups = []
+    start = 0
+    for index in range(1, len(messages) + 1):
+        if index == len(messages) or messages[index].get("role") != "tool":
+            groups.append((start, index))
+            start = index
+    return groups
+
+
+class ContextWindow:
+    """
+    Keeps chat completion requests under a token budget.
+
+    Requests within `max_tokens` are sent unchanged. Over budget, the outputs
+    of older tool calls are replaced by a short placeholder, oldest first,
+    and if that is not enough the oldest messages are dropped a whole
+    assistant/tool group at a time. The first user message and the most
+    recent `keep_recent` groups are never touched. The conversation history
+    itself is never modified; only the request payload is rewritten.
+
+    Args:
+        max_tokens: Budget for the prompt messages, system message included.
+        keep_recent: Number of most recent message groups always sent as is.
+    """
+
+    def __init__(self, max_tokens: int, keep_recent: int = 1):
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        self.max_tokens = max_tokens
+        self.keep_recent = max(keep_recent, 1)
+
+    def fit(self, history, system_message: dict, model: str) -> Tuple[List[dict], int]:
+        """
+        Build the request messages for `history` within the budget.
+
+        Returns:
+            The messages to send and the number of tokens saved by trimming.
+
+        A request that cannot be trimmed enough is sent as is, even when
+        `keep_recent` covers more groups than the conversation has:
+
+        >>> from src.agents.swarm.history import History
+        >>> history = History([{"role": "user", "content": "word " * 50}])
+        >>> messages, saved = ContextWindow(10, keep_recent=3).fit(
+        ...     history, {"role": "system", "content": ""}, "gpt-4o")
+        >>> [message["role"] for message in messages], saved
+        (['system', 'user'], 0)
+        """
+        encoding = encoding_for(model)
+        messages = list(history)
+        counts = history.token_counts(
+            encoding.name if encoding else None,
+            lambda message: count_message_tokens(message, encoding),
+        )
+        system_tokens = count_message_tokens(system_message, encoding)
+        original = system_tokens + TOKENS_PER_REPLY + sum(counts)
+        if original <= self.max_tokens:
+            return history.payload(system_message), 0
+
+        groups = message_groups(messages)
+        # keep_recent may exceed the number of groups early in a conversation
+        recent = groups[-min(self.keep_recent, len(groups))][0] if groups else len(messages)
+        protected = set(range(recent, len(messages)))
+        if messages and messages[0].get("role") == "user" and groups:
+            protected.update(range(*groups[0]))
+        counts = list(counts)
+        total = original
+
+        # Compact old tool outputs first: the calls stay, so pairs remain valid
+        for index, message in enumerate(messages):
+            if total <= self.max_tokens:
+                break
+            if index in protected or message.get("role") != "tool":
+                continue
+            compacted = {
+                **message,
+                "content": COMPACTED_TOOL_OUTPUT.format(
+                    tool=message.get("tool_name") or "tool", tokens=counts[index]
+                ),
+            }
+            compacted_tokens = count_message_tokens(compacted, encoding)
+            if compacted_tokens >= counts[index]:
+                continue
+            total -= counts[index] - compacted_tokens
+            messages[index] = compacted
+            counts[index] = compacted_tokens
+
+        # Then drop whole groups, oldest first
+        dropped = set()
+        for start, end in groups:
+            if total <= self.max_tokens:
+                break
+            if start in protected:
+                continue
+            dropped.update(range(start, end))
+            total -= sum(counts[start:end])
+
+        if total > self.max_tokens:
+            logging.warning(
+                f"Request is {total} tokens after trimming, over the {self.max_tokens} token budget"
+            )
+
+        trimmed = [system_message]
+        trimmed.extend(message for index, message in enumerate(messages) if index not in dropped)
+        return trimmed, original - total
+
+
+def context_window_from_env() -> Optional[ContextWindow]:
+    """
+    Build a context window from SWARM_CONTEXT_TOKENS / SWARM_CONTEXT_KEEP_RECENT.
+
+    Returns None when SWARM_CONTEXT_TOKENS is unset, so requests carry the
+    full history as before.
+    """
+    max_tokens = os.getenv("SWARM_CONTEXT_TOKENS")
+    if not max_tokens:
+        return None
+    keep_recent = int(os.getenv("SWARM_CONTEXT_KEEP_RECENT", "1"))
+    return ContextWindow(int(max_tokens), keep_recent=keep_recent)
@@ -1,15 +1,25 @@
 # Standard library imports
-import copy
+import asyncio
 import json
+import threading
+import time
 from collections import defaultdict
-from typing import List, Callable, Union
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import copy_context
+from functools import lru_cache
+from typing import Dict, List, Callable, NamedTuple, Optional, Tuple, Union
 
 # Package/library imports
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 
 # Local imports
-from .util import function_to_json, debug_print, merge_chunk
+from .context_window import ContextWindow
+from .history import History
+from .timing import TurnTimer
+from src.utils.tracing import ending, span, start_span
+from .util import StreamAccumulator, function_to_json, debug_print, model_to_dict, usage_to_dict
 from .types import (
     Agent,
     AgentFunction,
@@ -21,42 +31,116 @@ from .types import (
 )
 
 __CTX_VARS_NAME__ = "context_variables"
+__DEFAULT_TOOL_WORKERS__ = 8
+
+
+class CompiledTools(NamedTuple):
+    """Ready-to-send tool payloads and name -> callable map for a function set."""
+
+    tools: List[dict]
+    function_map: Dict[str, AgentFunction]
+
+
+@lru_cache(maxsize=256)
+def compile_tools(functions: Tuple[AgentFunction, ...]) -> CompiledTools:
+    """
+    Build the tool schemas for a set of agent functions once.
+
+    Cached by the identity of the functions, so an agent's schemas are only
+    rebuilt when its function set changes. The returned payloads are shared
+    between requests and must be treated as read-only.
+    """
+    tools = [function_to_json(f) for f in functions]
+    # hide context_variables from model
+    for tool in tools:
+        params = tool["function"]["parameters"]
+        params["properties"].pop(__CTX_VARS_NAME__, None)
+        if __CTX_VARS_NAME__ in params["required"]:
+            params["required"].remove(__CTX_VARS_NAME__)
+
+    return CompiledTools(
+        tools=tools,
+        function_map={f.__name__: f for f in functions},
+    )
+
+
+class RunState:
+    """What one run of the turn loop accumulates, shared by all four loops."""
+
+    def __init__(self, agent: Agent, messages: List, context_variables: dict, run_span):
+        self.agent = agent
+        # Never mutated: the caller's messages are shared, not copied, and
+        # context variable updates go into a shallow copy
+        self.context_variables = dict(context_variables)
+        self.history = History(messages)
+        self.usage: List[dict] = []
+        self.timings: List[dict] = []
+        self.span = run_span
+
+    def new_messages(self) -> int:
+        return len(self.history) - self.history.init_len
 
 
 class Swarm:
-    def __init__(self, client=None):
+    def __init__(
+        self,
+        client=None,
+        max_tool_workers: int = __DEFAULT_TOOL_WORKERS__,
+        context_window: Optional[ContextWindow] = None,
+    ):
         if not client:
             client = OpenAI()
         self.client = client
-
-    def get_chat_completion(
+        self.max_tool_workers = max_tool_workers
+        # Without a context window every request carries the full history
+        self.context_window = context_window
+        self._tool_executor = None
+        self._tool_executor_lock = threading.Lock()
+
+    @property
+    def tool_executor(self) -> ThreadPoolExecutor:
+        """Executor shared by all conversations for running tool calls."""
+        if self._tool_executor is None:
+            with self._tool_executor_lock:
+                if self._tool_executor is None:
+                    self._tool_executor = ThreadPoolExecutor(
+                        max_workers=self.max_tool_workers,
+                        thread_name_prefix="swarm-tool",
+                    )
+        return self._tool_executor
+
+    def build_completion_params(
         self,
         agent: Agent,
-        history: List,
+        history: Union[History, List],
         context_variables: dict,
         model_override: str,
         stream: bool,
         debug: bool,
-    ) -> ChatCompletionMessage:
+    ) -> dict:
         context_variables = defaultdict(str, context_variables)
         instructions = (
             agent.instructions(context_variables)
             if callable(agent.instructions)
             else agent.instructions
         )
-        messages = [{"role": "system", "content": instructions}] + history
+        system_message = {"role": "system", "content": instructions}
+        model = model_override or agent.model
+        if isinstance(history, History) and self.context_window:
+            messages, tokens_saved = self.context_window.fit(history, system_message, model)
+            history.tokens_saved.append(tokens_saved)
+            if tokens_saved:
+                debug_print(debug, f"Context window saved {tokens_saved} tokens")
+        elif isinstance(history, History):
+            messages = history.payload(system_message)
+        else:
+            messages = [system_message] + history
         debug_print(debug, "Getting chat completion for...:", messages)
 
-        tools = [function_to_json(f) for f in agent.functions]
-        # hide context_variables from model
-        for tool in tools:
-            params = tool["function"]["parameters"]
-            params["properties"].pop(__CTX_VARS_NAME__, None)
-            if __CTX_VARS_NAME__ in params["required"]:
-                params["required"].remove(__CTX_VARS_NAME__)
+        tools = compile_tools(tuple(agent.functions)).tools
 
         create_params = {
-            "model": model_override or agent.model,
+            "model": model,
             "messages": messages,
             "tools": tools or None,
             "tool_choice": agent.tool_choice,
@@ -66,6 +150,24 @@ class Swarm:
         if tools:
             create_params["parallel_tool_calls"] = agent.parallel_tool_calls
 
+        if stream:
+            # Usage arrives in one extra chunk with no choices at the end
+            create_params["stream_options"] = {"include_usage": True}
+
+        return create_params
+
+    def get_chat_completion(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        stream: bool,
+        debug: bool,
+    ) -> ChatCompletionMessage:
+        create_params = self.build_completion_params(
+            agent, history, context_variables, model_override, stream, debug
+        )
         return self.client.chat.completions.create(**create_params)
 
     def handle_function_result(self, result, debug) -> Result:
@@ -86,56 +188,195 @@ class Swarm:
                     debug_print(debug, error_message)
                     raise TypeError(error_message)
 
-    def handle_tool_calls(
+    def call_tool(
         self,
-        tool_calls: List[ChatCompletionMessageToolCall],
-        functions: List[AgentFunction],
+        tool_call: ChatCompletionMessageToolCall,
+        function_map: dict,
         context_variables: dict,
         debug: bool,
+    ) -> Tuple[dict, Optional[Result]]:
+        """Execute a single tool call, returning its tool message and Result."""
+        name = tool_call.function.name
+        # handle missing tool case, skip to next tool
+        if name not in function_map:
+            debug_print(debug, f"Tool {name} not found in function map.")
+            return {
+                "role": "tool",
+                "tool_call_id": tool_call.id,
+                "tool_name": name,
+                "content": f"Error: Tool {name} not found.",
+            }, None
+        args = json.loads(tool_call.function.arguments)
+        debug_print(
+            debug, f"Processing tool call: {name} with arguments {args}")
+
+        func = function_map[name]
+        # pass context_variables to agent functions
+        if __CTX_VARS_NAME__ in func.__code__.co_varnames:
+            args[__CTX_VARS_NAME__] = context_variables
+        with span("swarm.tool_call", tool=name, args_bytes=len(tool_call.function.arguments)) as tool_span:
+            raw_result = function_map[name](**args)
+            result: Result = self.handle_function_result(raw_result, debug)
+            tool_span.set(result_bytes=len(result.value), handoff=bool(result.agent))
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "tool_name": name,
+            "content": result.value,
+        }, result
+
+    def merge_tool_results(
+        self, outcomes: List[Tuple[dict, Optional[Result]]]
     ) -> Response:
-        function_map = {f.__name__: f for f in functions}
+        """Fold tool call outcomes, in tool call order, into a partial Response."""
         partial_response = Response(
             messages=[], agent=None, context_variables={})
 
-        for tool_call in tool_calls:
-            name = tool_call.function.name
-            # handle missing tool case, skip to next tool
-            if name not in function_map:
-                debug_print(debug, f"Tool {name} not found in function map.")
-                partial_response.messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "tool_name": name,
-                        "content": f"Error: Tool {name} not found.",
-                    }
-                )
+        for message, result in outcomes:
+            partial_response.messages.append(message)
+            if result is None:
                 continue
-            args = json.loads(tool_call.function.arguments)
-            debug_print(
-                debug, f"Processing tool call: {name} with arguments {args}")
-
-            func = function_map[name]
-            # pass context_variables to agent functions
-            if __CTX_VARS_NAME__ in func.__code__.co_varnames:
-                args[__CTX_VARS_NAME__] = context_variables
-            raw_result = function_map[name](**args)
-
-            result: Result = self.handle_function_result(raw_result, debug)
-            partial_response.messages.append(
-                {
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "tool_name": name,
-                    "content": result.value,
-                }
-            )
             partial_response.context_variables.update(result.context_variables)
             if result.agent:
                 partial_response.agent = result.agent
 
         return partial_response
 
+    def handle_tool_calls(
+        self,
+        tool_calls: List[ChatCompletionMessageToolCall],
+        functions: List[AgentFunction],
+        context_variables: dict,
+        debug: bool,
+        parallel: bool = True,
+    ) -> Response:
+        """
+        Execute the tool calls of one assistant message.
+
+        With `parallel` and more than one call, the calls run concurrently on
+        the tool executor, each in a copy of the caller's context. Outcomes
+        are merged in the original tool call order either way, so messages,
+        context variable updates and handoffs are the same as a serial run.
+        """
+        function_map = compile_tools(tuple(functions)).function_map
+        if not parallel or len(tool_calls) < 2 or self.max_tool_workers < 2:
+            return self.merge_tool_results([
+                self.call_tool(tool_call, function_map, context_variables, debug)
+                for tool_call in tool_calls
+            ])
+
+        futures = [
+            self.tool_executor.submit(
+                copy_context().run,
+                self.call_tool, tool_call, function_map, context_variables, debug,
+            )
+            for tool_call in tool_calls
+        ]
+        return self.merge_tool_results([future.result() for future in futures])
+
+    @staticmethod
+    def new_stream_message(agent: Agent) -> dict:
+        return {
+            "content": "",
+            "sender": agent.name,
+            "role": "assistant",
+            "function_call": None,
+            "tool_calls": defaultdict(
+                lambda: {
+                    "function": {"arguments": "", "name": ""},
+                    "id": "",
+                    "type": "",
+                }
+            ),
+        }
+
+    @staticmethod
+    def stream_tool_calls(message: dict) -> List[ChatCompletionMessageToolCall]:
+        """Convert the tool calls of an accumulated stream message to objects."""
+        tool_calls = []
+        for tool_call in message["tool_calls"]:
+            function = Function(
+                arguments=tool_call["function"]["arguments"],
+                name=tool_call["function"]["name"],
+            )
+            tool_call_object = ChatCompletionMessageToolCall(
+                id=tool_call["id"], function=function, type=tool_call["type"]
+            )
+            tool_calls.append(tool_call_object)
+        return tool_calls
+
+    def start_run(
+        self, agent: Agent, messages: List, context_variables: dict, model_override: str, stream: bool
+    ) -> RunState:
+        run_span = start_span(
+            "swarm.run", agent=agent.name, model=model_override or agent.model, stream=stream
+        )
+        return RunState(agent, messages, context_variables, run_span)
+
+    @contextmanager
+    def running(self, state: RunState):
+        """
+        End the run's span when the block exits.
+
+        If the run fails, the Response it had built so far is attached to the
+        exception as `partial_response`, so callers can still account for
+        the completions that finished before the failure.
+        """
+        with ending(state.span):
+            try:
+                yield state
+            except Exception as e:
+                e.partial_response = self.finish_run(state)
+                raise
+
+    def start_turn(self, state: RunState) -> TurnTimer:
+        return TurnTimer(state.span, turn=len(state.timings), agent=state.agent.name)
+
+    def record_usage(self, state: RunState, completion_span, model: str, usage) -> None:
+        state.usage.append(usage_to_dict(model, usage))
+        completion_span.set(**state.usage[-1])
+
+    def stream_delta(self, state: RunState, completion_span, chunk) -> Optional[dict]:
+        """Record a chunk's usage and return its delta, or None if it has no choices."""
+        if chunk.usage:
+            self.record_usage(state, completion_span, chunk.model, chunk.usage)
+        if not chunk.choices:
+            return None
+        delta = model_to_dict(chunk.choices[0].delta)
+        if delta["role"] == "assistant":
+            delta["sender"] = state.agent.name
+        return delta
+
+    @staticmethod
+    def finish_stream_message(message: dict, accumulator: StreamAccumulator) -> dict:
+        accumulator.merge_into(message)
+        message["tool_calls"] = list(message.get("tool_calls", {}).values()) or None
+        return message
+
+    def add_message(self, state: RunState, message: dict, debug: bool) -> None:
+        debug_print(debug, "Received completion:", message)
+        state.history.append(message)
+
+    def end_turn(self, state: RunState, timer: TurnTimer, partial_response: Optional[Response] = None) -> None:
+        """Fold the turn's tool results into the run and record its timing."""
+        if partial_response is not None:
+            state.history.extend(partial_response.messages)
+            state.context_variables.update(partial_response.context_variables)
+            if partial_response.agent:
+                state.agent = partial_response.agent
+        state.timings.append(timer.finish())
+
+    def finish_run(self, state: RunState) -> Response:
+        state.span.set(turns=len(state.timings), messages=state.new_messages())
+        return Response(
+            messages=state.history.new_messages(),
+            agent=state.agent,
+            context_variables=state.context_variables,
+            tokens_saved=state.history.tokens_saved,
+            usage=state.usage,
+            timings=state.timings,
+        )
+
     def run_and_stream(
         self,
         agent: Agent,
@@ -146,89 +387,258 @@ class Swarm:
         max_turns: int = float("inf"),
         execute_tools: bool = True,
     ):
-        active_agent = agent
-        context_variables = copy.deepcopy(context_variables)
-        history = copy.deepcopy(messages)
-        init_len = len(messages)
-
-        while len(history) - init_len < max_turns:
-
-            message = {
-                "content": "",
-                "sender": agent.name,
-                "role": "assistant",
-                "function_call": None,
-                "tool_calls": defaultdict(
-                    lambda: {
-                        "function": {"arguments": "", "name": ""},
-                        "id": "",
-                        "type": "",
-                    }
-                ),
-            }
-
-            # get completion with current history, agent
-            completion = self.get_chat_completion(
-                agent=active_agent,
-                history=history,
+        state = self.start_run(agent, messages, context_variables, model_override, stream=True)
+        with self.running(state):
+            while state.new_messages() < max_turns:
+
+                message = self.new_stream_message(agent)
+                timer = self.start_turn(state)
+
+                # get completion with current history, agent
+                with timer.model(
+                    model=model_override or state.agent.model, messages=len(state.history) + 1
+                ) as completion_span:
+                    completion = self.get_chat_completion(
+                        agent=state.agent,
+                        history=state.history,
+                        context_variables=state.context_variables,
+                        model_override=model_override,
+                        stream=True,
+                        debug=debug,
+                    )
+
+                accumulator = StreamAccumulator()
+                with timer.paused():
+                    yield {"delim": "start"}
+                for chunk in timer.stream(completion):
+                    delta = self.stream_delta(state, completion_span, chunk)
+                    if delta is None:
+                        continue
+                    # Inlined timer.paused(): this runs once per streamed delta
+                    paused = time.perf_counter()
+                    yield delta
+                    timer.paused_time += time.perf_counter() - paused
+                    delta.pop("role", None)
+                    delta.pop("sender", None)
+                    accumulator.add(delta)
+                with timer.paused():
+                    yield {"delim": "end"}
+                self.add_message(state, self.finish_stream_message(message, accumulator), debug)
+
+                if not message["tool_calls"] or not execute_tools:
+                    debug_print(debug, "Ending turn.")
+                    self.end_turn(state, timer)
+                    break
+
+                # handle function calls, updating context_variables, and switching agents
+                with timer.tools():
+                    partial_response = self.handle_tool_calls(
+                        self.stream_tool_calls(message),
+                        state.agent.functions,
+                        state.context_variables,
+                        debug,
+                        parallel=state.agent.parallel_tool_calls,
+                    )
+                self.end_turn(state, timer, partial_response)
+            response = self.finish_run(state)
+
+        yield {"response": response}
+
+    def run(
+        self,
+        agent: Agent,
+        messages: List,
+        context_variables: dict = {},
+        model_override: str = None,
+        stream: bool = False,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+    ) -> Response:
+        if stream:
+            return self.run_and_stream(
+                agent=agent,
+                messages=messages,
                 context_variables=context_variables,
                 model_override=model_override,
-                stream=True,
                 debug=debug,
+                max_turns=max_turns,
+                execute_tools=execute_tools,
             )
+        state = self.start_run(agent, messages, context_variables, model_override, stream=False)
+        with self.running(state):
+            while state.new_messages() < max_turns and state.agent:
+
+                timer = self.start_turn(state)
+
+                # get completion with current history, agent
+                with timer.model(
+                    model=model_override or state.agent.model, messages=len(state.history) + 1
+                ) as completion_span:
+                    completion = self.get_chat_completion(
+                        agent=state.agent,
+                        history=state.history,
+                        context_variables=state.context_variables,
+                        model_override=model_override,
+                        stream=stream,
+                        debug=debug,
+                    )
+                if completion.usage:
+                    self.record_usage(state, completion_span, completion.model, completion.usage)
+                message = completion.choices[0].message
+                message.sender = state.agent.name
+                self.add_message(state, model_to_dict(message), debug)  # to avoid OpenAI types
+
+                if not message.tool_calls or not execute_tools:
+                    debug_print(debug, "Ending turn.")
+                    self.end_turn(state, timer)
+                    break
+
+                # handle function calls, updating context_variables, and switching agents
+                with timer.tools():
+                    partial_response = self.handle_tool_calls(
+                        message.tool_calls,
+                        state.agent.functions,
+                        state.context_variables,
+                        debug,
+                        parallel=state.agent.parallel_tool_calls,
+                    )
+                self.end_turn(state, timer, partial_response)
+            return self.finish_run(state)
+
+
+class AsyncSwarm(Swarm):
+    """
+    asyncio-native Swarm built on AsyncOpenAI.
+
+    Same turn loop, handoff and context variable semantics as Swarm, but
+    waiting on the model never blocks a thread, so a single event loop can
+    drive many conversations at once. Agent functions stay synchronous and
+    run on the tool executor in a copy of the caller's context, so they still
+    record into the active tool tracking scope.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        max_tool_workers: int = __DEFAULT_TOOL_WORKERS__,
+        context_window: Optional[ContextWindow] = None,
+    ):
+        if not client:
+            client = AsyncOpenAI()
+        super().__init__(
+            client=client,
+            max_tool_workers=max_tool_workers,
+            context_window=context_window,
+        )
 
-            yield {"delim": "start"}
-            for chunk in completion:
-                delta = json.loads(chunk.choices[0].delta.json())
-                if delta["role"] == "assistant":
-                    delta["sender"] = active_agent.name
-                yield delta
-                delta.pop("role", None)
-                delta.pop("sender", None)
-                merge_chunk(message, delta)
-            yield {"delim": "end"}
-
-            message["tool_calls"] = list(
-                message.get("tool_calls", {}).values())
-            if not message["tool_calls"]:
-                message["tool_calls"] = None
-            debug_print(debug, "Received completion:", message)
-            history.append(message)
-
-            if not message["tool_calls"] or not execute_tools:
-                debug_print(debug, "Ending turn.")
-                break
-
-            # convert tool_calls to objects
-            tool_calls = []
-            for tool_call in message["tool_calls"]:
-                function = Function(
-                    arguments=tool_call["function"]["arguments"],
-                    name=tool_call["function"]["name"],
-                )
-                tool_call_object = ChatCompletionMessageToolCall(
-                    id=tool_call["id"], function=function, type=tool_call["type"]
-                )
-                tool_calls.append(tool_call_object)
+    async def get_chat_completion(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        stream: bool,
+        debug: bool,
+    ) -> ChatCompletionMessage:
+        create_params = self.build_completion_params(
+            agent, history, context_variables, model_override, stream, debug
+        )
+        return await self.client.chat.completions.create(**create_params)
 
-            # handle function calls, updating context_variables, and switching agents
-            partial_response = self.handle_tool_calls(
-                tool_calls, active_agent.functions, context_variables, debug
+    async def handle_tool_calls(
+        self,
+        tool_calls: List[ChatCompletionMessageToolCall],
+        functions: List[AgentFunction],
+        context_variables: dict,
+        debug: bool,
+        parallel: bool = True,
+    ) -> Response:
+        function_map = compile_tools(tuple(functions)).function_map
+        loop = asyncio.get_running_loop()
+
+        def submit(tool_call):
+            return loop.run_in_executor(
+                self.tool_executor,
+                copy_context().run,
+                self.call_tool, tool_call, function_map, context_variables, debug,
             )
-            history.extend(partial_response.messages)
-            context_variables.update(partial_response.context_variables)
-            if partial_response.agent:
-                active_agent = partial_response.agent
 
-        yield {
-            "response": Response(
-                messages=history[init_len:],
-                agent=active_agent,
-                context_variables=context_variables,
-            )
-        }
+        if not parallel or len(tool_calls) < 2:
+            outcomes = [await submit(tool_call) for tool_call in tool_calls]
+        else:
+            # gather keeps results in tool call order
+            outcomes = list(await asyncio.gather(*map(submit, tool_calls)))
+        return self.merge_tool_results(outcomes)
 
-    def run(
+    async def run_and_stream(
+        self,
+        agent: Agent,
+        messages: List,
+        context_variables: dict = {},
+        model_override: str = None,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+    ):
+        state = self.start_run(agent, messages, context_variables, model_override, stream=True)
+        with self.running(state):
+            while state.new_messages() < max_turns:
+
+                message = self.new_stream_message(agent)
+                timer = self.start_turn(state)
+
+                # get completion with current history, agent
+                with timer.model(
+                    model=model_override or state.agent.model, messages=len(state.history) + 1
+                ) as completion_span:
+                    completion = await self.get_chat_completion(
+                        agent=state.agent,
+                        history=state.history,
+                        context_variables=state.context_variables,
+                        model_override=model_override,
+                        stream=True,
+                        debug=debug,
+                    )
+
+                accumulator = StreamAccumulator()
+                with timer.paused():
+                    yield {"delim": "start"}
+                async for chunk in timer.astream(completion):
+                    delta = self.stream_delta(state, completion_span, chunk)
+                    if delta is None:
+                        continue
+                    # Inlined timer.paused(): this runs once per streamed delta
+                    paused = time.perf_counter()
+                    yield delta
+                    timer.paused_time += time.perf_counter() - paused
+                    delta.pop("role", None)
+                    delta.pop("sender", None)
+                    accumulator.add(delta)
+                with timer.paused():
+                    yield {"delim": "end"}
+                self.add_message(state, self.finish_stream_message(message, accumulator), debug)
+
+                if not message["tool_calls"] or not execute_tools:
+                    debug_print(debug, "Ending turn.")
+                    self.end_turn(state, timer)
+                    break
+
+                # handle function calls, updating context_variables, and switching agents
+                with timer.tools():
+                    partial_response = await self.handle_tool_calls(
+                        self.stream_tool_calls(message),
+                        state.agent.functions,
+                        state.context_variables,
+                        debug,
+                        parallel=state.agent.parallel_tool_calls,
+                    )
+                self.end_turn(state, timer, partial_response)
+            response = self.finish_run(state)
+
+        yield {"response": response}
+
+    async def run(
         self,
         agent: Agent,
         messages: List,
@@ -249,44 +659,43 @@ class Swarm:
                 max_turns=max_turns,
                 execute_tools=execute_tools,
             )
-        active_agent = agent
-        context_variables = copy.deepcopy(context_variables)
-        history = copy.deepcopy(messages)
-        init_len = len(messages)
-
-        while len(history) - init_len < max_turns and active_agent:
-
-            # get completion with current history, agent
-            completion = self.get_chat_completion(
-                agent=active_agent,
-                history=history,
-                context_variables=context_variables,
-                model_override=model_override,
-                stream=stream,
-                debug=debug,
-            )
-            message = completion.choices[0].message
-            debug_print(debug, "Received completion:", message)
-            message.sender = active_agent.name
-            history.append(
-                json.loads(message.model_dump_json())
-            )  # to avoid OpenAI types (?)
-
-            if not message.tool_calls or not execute_tools:
-                debug_print(debug, "Ending turn.")
-                break
-
-            # handle function calls, updating context_variables, and switching agents
-            partial_response = self.handle_tool_calls(
-                message.tool_calls, active_agent.functions, context_variables, debug
-            )
-            history.extend(partial_response.messages)
-            context_variables.update(partial_response.context_variables)
-            if partial_response.agent:
-                active_agent = partial_response.agent
-
-        return Response(
-            messages=history[init_len:],
-            agent=active_agent,
-            context_variables=context_variables,
-        )
+        state = self.start_run(agent, messages, context_variables, model_override, stream=False)
+        with self.running(state):
+            while state.new_messages() < max_turns and state.agent:
+
+                timer = self.start_turn(state)
+
+                # get completion with current history, agent
+                with timer.model(
+                    model=model_override or state.agent.model, messages=len(state.history) + 1
+                ) as completion_span:
+                    completion = await self.get_chat_completion(
+                        agent=state.agent,
+                        history=state.history,
+                        context_variables=state.context_variables,
+                        model_override=model_override,
+                        stream=stream,
+                        debug=debug,
+                    )
+                if completion.usage:
+                    self.record_usage(state, completion_span, completion.model, completion.usage)
+                message = completion.choices[0].message
+                message.sender = state.agent.name
+                self.add_message(state, model_to_dict(message), debug)  # to avoid OpenAI types
+
+                if not message.tool_calls or not execute_tools:
+                    debug_print(debug, "Ending turn.")
+                    self.end_turn(state, timer)
+                    break
+
+                # handle function calls, updating context_variables, and switching agents
+                with timer.tools():
+                    partial_response = await self.handle_tool_calls(
+                        message.tool_calls,
+                        state.agent.functions,
+                        state.context_variables,
+                        debug,
+                        parallel=state.agent.parallel_tool_calls,
+                    )
+                self.end_turn(state, timer, partial_response)
+            return self.finish_run(state)
@@ -0,0 +1,60 @@
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+
+class History:
+    """
+    Append-only conversation history that shares the caller's messages.
+
+    The caller's messages are referenced rather than deep-copied, and neither
+    the caller's list nor any message in it is ever modified: the loop only
+    appends new message dicts and never changes a message once appended.
+
+    The request payload is the history itself with one slot in front for the
+    system message, so building a request costs O(1) no matter how long the
+    conversation is and messages already seen are never copied again.
+    """
+
+    def __init__(self, messages: Sequence[dict]):
+        self._payload: List[dict] = [None, *messages]
+        self.init_len = len(messages)
+        # Tokens saved by the context window for each request, in turn order
+        self.tokens_saved: List[int] = []
+        self._token_counts: Dict[Optional[str], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._payload) - 1
+
+    def __iter__(self):
+        return iter(self._payload[1:])
+
+    def append(self, message: dict) -> None:
+        self._payload.append(message)
+
+    def extend(self, messages: Iterable[dict]) -> None:
+        self._payload.extend(messages)
+
+    def new_messages(self) -> List[dict]:
+        """Messages added since the history was created."""
+        return self._payload[1 + self.init_len:]
+
+    def payload(self, system_message: dict) -> List[dict]:
+        """
+        Return the request messages: the system message followed by the history.
+
+        The returned list is shared with the history and only valid until the
+        next call that changes it; it must not be modified.
+        """
+        self._payload[0] = system_message
+        return self._payload
+
+    def token_counts(self, encoding: Optional[str], count: Callable[[dict], int]) -> List[int]:
+        """
+        Token count of every message, computed once per message and encoding.
+
+        Messages never change once appended, so only messages added since the
+        last call are counted. The returned list must not be modified.
+        """
+        counts = self._token_counts.setdefault(encoding, [])
+        for message in self._payload[1 + len(counts):]:
+            counts.append(count(message))
+        return counts
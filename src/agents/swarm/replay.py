@@ -0,0 +1,215 @@
+"""
+Record/replay cache for chat completions.
+
+ReplayClient and AsyncReplayClient stand in for an OpenAI / AsyncOpenAI
+client wherever only `client.chat.completions.create` is used (Swarm,
+AsyncSwarm and LangChain's ChatOpenAI). Completions are stored on disk,
+keyed by a stable hash of the request, in one of three modes:
+
+- "record": always call the model and store the completion
+- "replay": serve stored completions only, never touching the network
+- "auto": serve stored completions, calling and recording on a miss
+
+Pick the mode for the shared agent clients with the SWARM_REPLAY_MODE
+environment variable ("off" by default) and the cache location with
+SWARM_REPLAY_DIR.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+REPLAY_MODES = ("record", "replay", "auto")
+DEFAULT_REPLAY_DIR = ".replay_cache"
+
+# Request fields that decide what the model returns
+KEY_FIELDS = ("model", "messages", "tools", "tool_choice", "parallel_tool_calls", "temperature", "stream")
+
+
+class ReplayMiss(LookupError):
+    """Raised in replay mode when no completion was recorded for a request."""
+
+
+def key_message(message: Any) -> Any:
+    """
+    The part of a request message that goes into its key.
+
+    Tool results are keyed by the call they answer, not by their content:
+    the call itself is already part of the preceding assistant message, and
+    tool output can differ between record and replay (code_tool reports
+    execution time, CPU time and peak memory).
+    """
+    if isinstance(message, dict) and message.get("role") == "tool":
+        return {
+            "role": "tool",
+            "tool_call_id": message.get("tool_call_id"),
+            "name": message.get("tool_name") or message.get("name"),
+        }
+    return message
+
+
+def request_key(params: Dict[str, Any]) -> str:
+    """Stable hash of the parts of a completion request that affect its output."""
+    payload = {field: params.get(field) for field in KEY_FIELDS}
+    payload["messages"] = [key_message(message) for message in params.get("messages") or []]
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ReplayStore:
+    """Completions on disk, one JSON file per request key."""
+
+    def __init__(self, cache_dir: str = DEFAULT_REPLAY_DIR):
+        self.cache_dir = cache_dir
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(key), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, entry: Dict[str, Any]) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+
+class ReplayStream:
+    """Iterable over replayed or recorded chunks, usable like an OpenAI Stream."""
+
+    def __init__(self, chunks, on_complete=None):
+        self._chunks = chunks
+        self._on_complete = on_complete
+
+    def __iter__(self):
+        recorded = []
+        for chunk in self._chunks:
+            recorded.append(chunk)
+            yield chunk
+        if self._on_complete:
+            self._on_complete(recorded)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+    def close(self):
+        return None
+
+
+class AsyncReplayStream(ReplayStream):
+    """Async counterpart of ReplayStream, usable like an OpenAI AsyncStream."""
+
+    async def __aiter__(self):
+        recorded = []
+        if hasattr(self._chunks, "__aiter__"):
+            async for chunk in self._chunks:
+                recorded.append(chunk)
+                yield chunk
+        else:
+            for chunk in self._chunks:
+                recorded.append(chunk)
+                yield chunk
+        if self._on_complete:
+            self._on_complete(recorded)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+
+class ReplayClient:
+    """Record/replay wrapper around an OpenAI client's chat completions."""
+
+    stream_class = ReplayStream
+
+    def __init__(self, client=None, mode: str = "auto", cache_dir: str = DEFAULT_REPLAY_DIR):
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode {mode!r}. Expected one of {REPLAY_MODES}")
+        if client is None and mode != "replay":
+            raise ValueError(f"Replay mode {mode!r} needs a client to call the model")
+        self.client = client
+        self.mode = mode
+        self.store = ReplayStore(cache_dir)
+        # Mimic the client.chat.completions.create surface
+        self.chat = SimpleNamespace(completions=self)
+
+    def lookup(self, params: Dict[str, Any]):
+        """Return (key, replayed response or None)."""
+        key = request_key(params)
+        if self.mode == "record":
+            return key, None
+        entry = self.store.load(key)
+        if entry is None:
+            if self.mode == "replay":
+                raise ReplayMiss(f"No recorded completion for request {key}")
+            return key, None
+        if "chunks" in entry:
+            return key, self.stream_class(
+                [ChatCompletionChunk.model_validate(chunk) for chunk in entry["chunks"]]
+            )
+        return key, ChatCompletion.model_validate(entry["completion"])
+
+    def record(self, key: str, params: Dict[str, Any], response):
+        """Store a live response, wrapping streams so they are saved once consumed."""
+        if params.get("stream"):
+            def save_chunks(chunks: List[ChatCompletionChunk]):
+                self.store.save(key, {"chunks": [chunk.model_dump(mode="json") for chunk in chunks]})
+            return self.stream_class(response, on_complete=save_chunks)
+        self.store.save(key, {"completion": response.model_dump(mode="json")})
+        return response
+
+    def create(self, **params):
+        key, replayed = self.lookup(params)
+        if replayed is not None:
+            return replayed
+        return self.record(key, params, self.client.chat.completions.create(**params))
+
+
+class AsyncReplayClient(ReplayClient):
+    """Record/replay wrapper around an AsyncOpenAI client's chat completions."""
+
+    stream_class = AsyncReplayStream
+
+    async def create(self, **params):
+        key, replayed = self.lookup(params)
+        if replayed is not None:
+            return replayed
+        return self.record(key, params, await self.client.chat.completions.create(**params))
+
+
+def replay_client_from_env(async_client: bool = False):
+    """
+    Build a replay client from SWARM_REPLAY_MODE / SWARM_REPLAY_DIR.
+
+    Returns None when replay is off, so callers fall back to a live client.
+    Replay mode creates no OpenAI client at all and needs no API key.
+    """
+    mode = os.getenv("SWARM_REPLAY_MODE", "off")
+    cache_dir = os.getenv("SWARM_REPLAY_DIR", DEFAULT_REPLAY_DIR)
+    if mode == "off":
+        return None
+    from openai import AsyncOpenAI, OpenAI
+
+    if async_client:
+        live = AsyncOpenAI() if mode != "replay" else None
+        return AsyncReplayClient(live, mode=mode, cache_dir=cache_dir)
+    live = OpenAI() if mode != "replay" else None
+    return ReplayClient(live, mode=mode, cache_dir=cache_dir)
@@ -0,0 +1,115 @@
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Iterable, Iterator, Optional
+
+from src.utils.tracing import NOOP_SPAN, start_span, use_span
+
+
+class TurnTimer:
+    """
+    Splits the wall time of one turn of the agent loop.
+
+    A turn is one chat completion plus the tool calls it asks for. Time spent
+    waiting on the model (including reading a stream) goes to `model_time`,
+    time running tools to `tool_time`, and whatever is left of the turn is
+    the loop's own `framework_time`. While a streaming run is suspended at a
+    `yield` the clock is paused, so the caller's processing of events is not
+    counted. `ttft` is the time from sending the request to the first chunk
+    with content; without streaming it equals `model_time`.
+
+    When tracing is on, the turn is also recorded as a "swarm.turn" span
+    under `parent`, with a "chat.completion" child that stays open until the
+    response has been read, and tool calls nested under the turn.
+    """
+
+    def __init__(self, parent=NOOP_SPAN, **attributes):
+        self.started = time.perf_counter()
+        self.ttft: Optional[float] = None
+        self.model_time = 0.0
+        self.tool_time = 0.0
+        self.paused_time = 0.0
+        self.span = start_span("swarm.turn", parent=parent, **attributes)
+        self.completion_span = NOOP_SPAN
+
+    @contextmanager
+    def model(self, **attributes):
+        """Time a model request and yield its completion span."""
+        self.completion_span = start_span("chat.completion", parent=self.span, **attributes)
+        started = time.perf_counter()
+        try:
+            yield self.completion_span
+        finally:
+            self.model_time += time.perf_counter() - started
+
+    def end_completion(self) -> None:
+        self.completion_span.end(
+            ttft=self.model_time if self.ttft is None else self.ttft,
+            model_time=self.model_time,
+        )
+
+    @contextmanager
+    def tools(self):
+        """Time the turn's tool calls, nesting their spans under the turn."""
+        self.end_completion()
+        started = time.perf_counter()
+        try:
+            with use_span(self.span):
+                yield
+        finally:
+            self.tool_time += time.perf_counter() - started
+
+    @contextmanager
+    def paused(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.paused_time += time.perf_counter() - started
+
+    def stream(self, chunks: Iterable) -> Iterator:
+        """Yield from a completion stream, counting the time spent waiting on it."""
+        iterator = iter(chunks)
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                chunk = None
+            self.model_time += time.perf_counter() - started
+            if chunk is None:
+                self.end_completion()
+                return
+            if self.ttft is None and chunk.choices:
+                self.ttft = self.model_time
+            yield chunk
+
+    async def astream(self, chunks) -> AsyncIterator:
+        """Async counterpart of stream."""
+        iterator = chunks.__aiter__()
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                chunk = None
+            self.model_time += time.perf_counter() - started
+            if chunk is None:
+                self.end_completion()
+                return
+            if self.ttft is None and chunk.choices:
+                self.ttft = self.model_time
+            yield chunk
+
+    def finish(self) -> dict:
+        """Stop the clock and return the turn's breakdown in seconds."""
+        turn_time = time.perf_counter() - self.started - self.paused_time
+        timing = {
+            "ttft": self.model_time if self.ttft is None else self.ttft,
+            "model_time": self.model_time,
+            "tool_time": self.tool_time,
+            "framework_time": max(turn_time - self.model_time - self.tool_time, 0.0),
+            "turn_time": turn_time,
+        }
+        self.end_completion()
+        self.span.end(**timing)
+        return timing
@@ -24,6 +24,12 @@ class Response(BaseModel):
     messages: List = []
     agent: Optional[Agent] = None
     context_variables: dict = {}
+    # Prompt tokens the context window trimmed from each request, per turn
+    tokens_saved: List[int] = []
+    # Token usage of each completion: model, prompt/completion/cached tokens
+    usage: List[dict] = []
+    # Latency of each turn in seconds: ttft, model, tool and framework time
+    timings: List[dict] = []
 
 
 class Result(BaseModel):
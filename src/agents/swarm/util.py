@@ -1,5 +1,8 @@
 import inspect
 from datetime import datetime
+from typing import Any, Dict
+
+from pydantic import BaseModel
 
 
 def debug_print(debug: bool, *args: str) -> None:
@@ -10,6 +13,42 @@ def debug_print(debug: bool, *args: str) -> None:
     print(f"\033[97m[\033[90m{timestamp}\033[97m]\033[90m {message}\033[0m")
 
 
+def model_to_dict(obj: BaseModel) -> dict:
+    """
+    Converts an OpenAI response object (message, delta, tool call) into
+    plain dicts and lists.
+
+    Gives the same result as json.loads(obj.model_dump_json()) for the
+    message and delta types, including extra attributes such as `sender`,
+    but copies the field values directly instead of serializing to a JSON
+    string and parsing it back.
+    """
+    # pydantic keeps field values in __dict__, in field order
+    result = obj.__dict__.copy()
+    for name, value in result.items():
+        if value is None or value.__class__ in _PLAIN_TYPES:
+            continue
+        result[name] = _to_plain(value)
+    extra = obj.__pydantic_extra__
+    if extra:
+        for name, value in extra.items():
+            result[name] = _to_plain(value)
+    return result
+
+
+_PLAIN_TYPES = {str, int, float, bool}
+
+
+def _to_plain(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return model_to_dict(value)
+    if isinstance(value, list):
+        return [_to_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_plain(item) for key, item in value.items()}
+    return value
+
+
 def merge_fields(target, source):
     for key, value in source.items():
         if isinstance(value, str):
@@ -28,6 +67,86 @@ def merge_chunk(final_response: dict, delta: dict) -> None:
         merge_fields(final_response["tool_calls"][index], tool_calls[0])
 
 
+class StreamAccumulator:
+    """
+    Collects the deltas of one streamed message and joins them once.
+
+    Equivalent to calling merge_chunk for every delta, but string fragments
+    are gathered per field and per tool call index and joined a single time
+    in merge_into, so accumulating a long stream is linear in its length
+    instead of re-copying the growing buffer for every delta. Deltas are not
+    modified.
+    """
+
+    def __init__(self):
+        # Nested dicts mirroring the message, with lists of fragments as leaves
+        self._fragments: Dict[str, Any] = {}
+        self._tool_calls: Dict[int, Dict[str, Any]] = {}
+
+    def add(self, delta: dict) -> None:
+        fragments = self._fragments
+        for key, value in delta.items():
+            if value is None or key == "role":
+                continue
+            if value.__class__ is str:
+                parts = fragments.get(key)
+                if parts is None:
+                    fragments[key] = [value]
+                else:
+                    parts.append(value)
+            elif key == "tool_calls":
+                for tool_call in value:
+                    index = tool_call["index"]
+                    tool_fragments = self._tool_calls.get(index)
+                    if tool_fragments is None:
+                        tool_fragments = self._tool_calls[index] = {}
+                    _collect_fragments(tool_fragments, tool_call)
+            elif isinstance(value, dict):
+                _collect_fragments(fragments.setdefault(key, {}), value)
+
+    def merge_into(self, message: dict) -> dict:
+        """Append the joined fragments to the fields of `message` and return it."""
+        _apply_fragments(message, self._fragments)
+        for index, fragments in self._tool_calls.items():
+            _apply_fragments(message["tool_calls"][index], fragments)
+        return message
+
+
+def _collect_fragments(fragments: Dict[str, Any], source: dict) -> None:
+    for key, value in source.items():
+        if value is None:
+            continue
+        if value.__class__ is str:
+            parts = fragments.get(key)
+            if parts is None:
+                fragments[key] = [value]
+            else:
+                parts.append(value)
+        elif isinstance(value, dict):
+            _collect_fragments(fragments.setdefault(key, {}), value)
+
+
+def _apply_fragments(target: dict, fragments: Dict[str, Any]) -> None:
+    for key, parts in fragments.items():
+        if isinstance(parts, dict):
+            if target.get(key) is None:
+                target[key] = {}
+            _apply_fragments(target[key], parts)
+        else:
+            target[key] = (target.get(key) or "") + "".join(parts)
+
+
+def usage_to_dict(model: str, usage) -> dict:
+    """Token usage of one completion from an OpenAI CompletionUsage."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "model": model,
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "cached_tokens": (details.cached_tokens if details else None) or 0,
+    }
+
+
 def function_to_json(func) -> dict:
     """
     Converts a Python function into a JSON-serializable dictionary
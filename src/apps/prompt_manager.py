@@ -8,55 +8,43 @@ from typing import Dict, Any
 root_dir = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(root_dir))
 
-from src.database.connection import get_connection
+from src.database.connection import pooled_connection
 from src.tools import DEFAULT_TOOLS
 
 def insert_prompts_from_json(data: Dict[str, Any]) -> tuple[int, str]:
     """Insert prompts from JSON data and return count of inserted prompts and any error message"""
     try:
-        conn, cursor = get_connection()
         inserted_count = 0
+        with pooled_connection() as (conn, cursor):
+            for prompt_data in data['prompts']:
+                # Use default tools if tools_available is not provided
+                tools_available = prompt_data.get('tools_available', DEFAULT_TOOLS)
+                
+                cursor.execute("""
+                    INSERT INTO prompts (prompt, prompt_category, correct_tools, tools_available)
+                    VALUES (%s, %s, %s, %s)
+                """, (
+                    prompt_data['prompt'],
+                    prompt_data['prompt_category'],
+                    prompt_data['correct_tool'],
+                    tools_available
+                ))
+                inserted_count += 1
         
-        for prompt_data in data['prompts']:
-            # Use default tools if tools_available is not provided
-            tools_available = prompt_data.get('tools_available', DEFAULT_TOOLS)
-            
-            cursor.execute("""
-                INSERT INTO prompts (prompt, prompt_category, correct_tools, tools_available)
-                VALUES (%s, %s, %s, %s)
-            """, (
-                prompt_data['prompt'],
-                prompt_data['prompt_category'],
-                prompt_data['correct_tool'],
-                tools_available
-            ))
-            inserted_count += 1
-        
-        conn.commit()
         return inserted_count, ""
         
     except Exception as e:
         return 0, str(e)
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
 
 def get_prompt_count() -> tuple[int, str]:
     """Get total number of prompts in database"""
     try:
-        conn, cursor = get_connection()
-        cursor.execute("SELECT COUNT(*) FROM prompts")
-        count = cursor.fetchone()[0]
+        with pooled_connection() as (conn, cursor):
+            cursor.execute("SELECT COUNT(*) FROM prompts")
+            count = cursor.fetchone()[0]
         return count, ""
     except Exception as e:
         return 0, str(e)
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
 
 def main():
     st.title("Prompt Manager")
@@ -1,19 +1,114 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
 import psycopg2
-from typing import Tuple
+from psycopg2.pool import ThreadedConnectionPool
+
+DB_CONFIG = {
+    "host": "localhost",
+    "dbname": "postgres",
+    "user": "postgres",
+    "password": "postgres",
+    "port": 5432,
+}
+
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
 
 def get_connection() -> Tuple[psycopg2.extensions.connection, psycopg2.extensions.cursor]:
-    """Create and return a database connection and cursor."""
-    conn = psycopg2.connect(
-        host="localhost",
-        dbname="postgres",
-        user="postgres",
-        password="postgres",
-        port=5432,
-    )
+    """Create and return a dedicated (unpooled) database connection and cursor."""
+    conn = psycopg2.connect(**DB_CONFIG)
     cursor = conn.cursor()
     return conn, cursor
 
 def close_connection(conn: psycopg2.extensions.connection, cursor: psycopg2.extensions.cursor) -> None:
     """Close database connection and cursor."""
     cursor.close()
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+class ConnectionPool:
+    """
+    Thread-safe pool of database connections.
+
+    Wraps psycopg2's ThreadedConnectionPool, which raises when every
+    connection is checked out, so callers wait for a free connection instead.
+    """
+
+    def __init__(self, min_size: int, max_size: int, **config):
+        self._pool = ThreadedConnectionPool(min_size, max_size, **config)
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.min_size = min_size
+        self.max_size = max_size
+
+    def getconn(self) -> psycopg2.extensions.connection:
+        self._slots.acquire()
+        try:
+            return self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn: psycopg2.extensions.connection, close: bool = False) -> None:
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            self._slots.release()
+
+    def closeall(self) -> None:
+        self._pool.closeall()
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+def configure_pool(min_size: int = POOL_MIN_SIZE, max_size: int = POOL_MAX_SIZE) -> ConnectionPool:
+    """(Re)create the shared connection pool with the given size bounds."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+        _pool = ConnectionPool(min_size, max_size, **DB_CONFIG)
+        return _pool
+
+def get_pool() -> ConnectionPool:
+    """Return the shared connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(POOL_MIN_SIZE, POOL_MAX_SIZE, **DB_CONFIG)
+    return _pool
+
+def close_pool() -> None:
+    """Close every connection of the shared pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+@contextmanager
+def pooled_connection() -> Iterator[Tuple[psycopg2.extensions.connection, psycopg2.extensions.cursor]]:
+    """
+    Borrow a connection and cursor from the shared pool.
+
+    Commits when the block succeeds and rolls back when it raises. The
+    connection goes back to the pool afterwards; broken connections are
+    discarded instead.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        cursor = conn.cursor()
+        try:
+            yield conn, cursor
+            conn.commit()
+        except BaseException:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    finally:
+        pool.putconn(conn, close=bool(conn.closed))
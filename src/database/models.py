@@ -25,4 +25,14 @@ class Result(BaseModel):
     time_taken: float
     success_rate: bool
     error_type: Optional[str]
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None
+    model_calls: Optional[int] = None
+    wall_time: Optional[float] = None
+    first_token_time: Optional[float] = None
+    model_time: Optional[float] = None
+    tool_time: Optional[float] = None
+    framework_time: Optional[float] = None
+    turn_timings: Optional[List[dict]] = None
\ No newline at end of file
@@ -1,36 +1,81 @@
-from typing import List, Optional, Dict, Any
+import uuid
+from typing import Iterator, List, Optional, Dict, Any, Set, Tuple
 from datetime import datetime
-from .connection import get_connection
+from .connection import pooled_connection
 from .models import Prompt, TestRun, Result
 
+PROMPT_COLUMNS = ("id", "prompt", "prompt_category", "correct_tools", "tools_available")
+PROMPTS_QUERY = """
+    SELECT id, prompt, prompt_category, correct_tools, tools_available 
+    FROM prompts
+    ORDER BY id;
+"""
+
+RESULT_COLUMNS = (
+    "id", "prompt_id", "test_run_id", "tool_calls", "time_taken",
+    "success_rate", "error_type", "created_at",
+    "prompt_tokens", "completion_tokens", "cached_tokens", "model_calls",
+    "wall_time", "first_token_time", "model_time", "tool_time", "framework_time",
+)
+RESULTS_QUERY = """
+    SELECT id, prompt_id, test_run_id, tool_calls, time_taken, 
+           success_rate, error_type, created_at,
+           prompt_tokens, completion_tokens, cached_tokens, model_calls,
+           wall_time, first_token_time, model_time, tool_time, framework_time
+    FROM results
+    ORDER BY created_at DESC;
+"""
+
+RESULT_DETAIL_COLUMNS = (
+    "id", "time_taken", "success_rate", "error_type", "created_at", "tool_calls",
+    "prompt_tokens", "completion_tokens", "cached_tokens", "model_calls",
+    "wall_time", "first_token_time", "model_time", "tool_time", "framework_time",
+    "prompt", "prompt_category", "correct_tools", "model_name", "instructions",
+)
+RESULTS_WITH_DETAILS_QUERY = """
+    SELECT r.id, r.time_taken, r.success_rate, r.error_type, 
+           r.created_at, r.tool_calls,
+           r.prompt_tokens, r.completion_tokens, r.cached_tokens, r.model_calls,
+           r.wall_time, r.first_token_time, r.model_time, r.tool_time, r.framework_time,
+           p.prompt, p.prompt_category, p.correct_tools,
+           t.model_name, t.instructions
+    FROM results r
+    JOIN prompts p ON r.prompt_id = p.id
+    JOIN test_runs t ON r.test_run_id = t.id
+    ORDER BY r.created_at DESC;
+"""
+
+DEFAULT_FETCH_SIZE = 1000
+
+def stream_query(query: str, columns: Tuple[str, ...], params: tuple = (),
+                 fetch_size: int = DEFAULT_FETCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the rows of a query as dicts, fetched through a server-side cursor.
+
+    Rows are pulled from Postgres `fetch_size` at a time, so memory stays
+    constant however large the result is. The pooled connection is held
+    until the generator is exhausted or closed.
+    """
+    with pooled_connection() as (conn, _):
+        with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cur:
+            cur.itersize = fetch_size
+            cur.execute(query, params)
+            for row in cur:
+                yield dict(zip(columns, row))
+
 def get_all_prompts() -> List[Dict[str, Any]]:
     """Retrieve all prompts from the database."""
-    conn, cur = get_connection()
-    try:
-        cur.execute("""
-            SELECT id, prompt, prompt_category, correct_tools, tools_available 
-            FROM prompts
-            ORDER BY id;
-        """)
-        prompts = cur.fetchall()
-        return [
-            {
-                "id": row[0],
-                "prompt": row[1],
-                "prompt_category": row[2],
-                "correct_tools": row[3],
-                "tools_available": row[4]
-            }
-            for row in prompts
-        ]
-    finally:
-        cur.close()
-        conn.close()
+    with pooled_connection() as (conn, cur):
+        cur.execute(PROMPTS_QUERY)
+        return [dict(zip(PROMPT_COLUMNS, row)) for row in cur.fetchall()]
+
+def iter_prompts(fetch_size: int = DEFAULT_FETCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """Stream all prompts from the database."""
+    return stream_query(PROMPTS_QUERY, PROMPT_COLUMNS, fetch_size=fetch_size)
 
 def get_all_test_runs() -> List[Dict[str, Any]]:
     """Retrieve all test runs from the database."""
-    conn, cur = get_connection()
-    try:
+    with pooled_connection() as (conn, cur):
         cur.execute("""
             SELECT id, model_name, instructions, started_at, completed_at, configuration
             FROM test_runs
@@ -48,77 +93,61 @@ def get_all_test_runs() -> List[Dict[str, Any]]:
             }
             for row in test_runs
         ]
-    finally:
-        cur.close()
-        conn.close()
 
-def get_all_results() -> List[Dict[str, Any]]:
-    """Retrieve all results from the database."""
-    conn, cur = get_connection()
-    try:
+def get_test_run(test_run_id: int) -> Optional[Dict[str, Any]]:
+    """Retrieve a single test run, or None if it doesn't exist."""
+    with pooled_connection() as (conn, cur):
+        cur.execute("""
+            SELECT id, model_name, instructions, started_at, completed_at, configuration, agent_type
+            FROM test_runs
+            WHERE id = %s;
+        """, (test_run_id,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "model_name": row[1],
+            "instructions": row[2],
+            "started_at": row[3],
+            "completed_at": row[4],
+            "configuration": row[5],
+            "agent_type": row[6]
+        }
+
+def get_completed_prompt_ids(test_run_id: int) -> Set[int]:
+    """Retrieve the ids of the prompts that already have a result in a test run."""
+    with pooled_connection() as (conn, cur):
         cur.execute("""
-            SELECT id, prompt_id, test_run_id, tool_calls, time_taken, 
-                   success_rate, error_type, created_at
+            SELECT DISTINCT prompt_id
             FROM results
-            ORDER BY created_at DESC;
-        """)
-        results = cur.fetchall()
-        return [
-            {
-                "id": row[0],
-                "prompt_id": row[1],
-                "test_run_id": row[2],
-                "tool_calls": row[3],
-                "time_taken": row[4],
-                "success_rate": row[5],
-                "error_type": row[6],
-                "created_at": row[7]
-            }
-            for row in results
-        ]
-    finally:
-        cur.close()
-        conn.close()
+            WHERE test_run_id = %s;
+        """, (test_run_id,))
+        return {row[0] for row in cur.fetchall()}
+
+def get_all_results() -> List[Dict[str, Any]]:
+    """Retrieve all results from the database."""
+    with pooled_connection() as (conn, cur):
+        cur.execute(RESULTS_QUERY)
+        return [dict(zip(RESULT_COLUMNS, row)) for row in cur.fetchall()]
+
+def iter_results(fetch_size: int = DEFAULT_FETCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """Stream all results from the database."""
+    return stream_query(RESULTS_QUERY, RESULT_COLUMNS, fetch_size=fetch_size)
 
 def get_results_with_details() -> List[Dict[str, Any]]:
     """Retrieve all results with related prompt and test run details."""
-    conn, cur = get_connection()
-    try:
-        cur.execute("""
-            SELECT r.id, r.time_taken, r.success_rate, r.error_type, 
-                   r.created_at, r.tool_calls,
-                   p.prompt, p.prompt_category, p.correct_tool,
-                   t.model_name, t.instructions
-            FROM results r
-            JOIN prompts p ON r.prompt_id = p.id
-            JOIN test_runs t ON r.test_run_id = t.id
-            ORDER BY r.created_at DESC;
-        """)
-        results = cur.fetchall()
-        return [
-            {
-                "id": row[0],
-                "time_taken": row[1],
-                "success_rate": row[2],
-                "error_type": row[3],
-                "created_at": row[4],
-                "tool_calls": row[5],
-                "prompt": row[6],
-                "prompt_category": row[7],
-                "correct_tool": row[8],
-                "model_name": row[9],
-                "instructions": row[10]
-            }
-            for row in results
-        ]
-    finally:
-        cur.close()
-        conn.close()
+    with pooled_connection() as (conn, cur):
+        cur.execute(RESULTS_WITH_DETAILS_QUERY)
+        return [dict(zip(RESULT_DETAIL_COLUMNS, row)) for row in cur.fetchall()]
+
+def iter_results_with_details(fetch_size: int = DEFAULT_FETCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """Stream all results with related prompt and test run details."""
+    return stream_query(RESULTS_WITH_DETAILS_QUERY, RESULT_DETAIL_COLUMNS, fetch_size=fetch_size)
 
 def get_success_rate_by_model() -> List[Dict[str, Any]]:
     """Get success rate statistics grouped by model."""
-    conn, cur = get_connection()
-    try:
+    with pooled_connection() as (conn, cur):
         cur.execute("""
             SELECT t.model_name,
                    COUNT(*) as total_runs,
@@ -141,6 +170,67 @@ def get_success_rate_by_model() -> List[Dict[str, Any]]:
             }
             for row in stats
         ]
-    finally:
-        cur.close()
-        conn.close()
\ No newline at end of file
+
+def get_token_usage_by_model() -> List[Dict[str, Any]]:
+    """Get token usage statistics grouped by model, most expensive first."""
+    with pooled_connection() as (conn, cur):
+        cur.execute("""
+            SELECT t.model_name,
+                   COUNT(r.prompt_tokens) as prompts_with_usage,
+                   SUM(r.prompt_tokens) as prompt_tokens,
+                   SUM(r.completion_tokens) as completion_tokens,
+                   SUM(r.cached_tokens) as cached_tokens,
+                   AVG(r.prompt_tokens + r.completion_tokens) as avg_tokens_per_prompt,
+                   SUM(r.cached_tokens)::float / NULLIF(SUM(r.prompt_tokens), 0) * 100 as cache_hit_percentage
+            FROM results r
+            JOIN test_runs t ON r.test_run_id = t.id
+            GROUP BY t.model_name
+            ORDER BY SUM(r.prompt_tokens + r.completion_tokens) DESC NULLS LAST;
+        """)
+        stats = cur.fetchall()
+        return [
+            {
+                "model_name": row[0],
+                "prompts_with_usage": row[1],
+                "prompt_tokens": row[2],
+                "completion_tokens": row[3],
+                "cached_tokens": row[4],
+                "avg_tokens_per_prompt": row[5],
+                "cache_hit_percentage": row[6]
+            }
+            for row in stats
+        ]
+
+LATENCY_METRICS = ("wall_time", "first_token_time", "model_time", "tool_time", "framework_time")
+
+def get_latency_percentiles(test_run_id: int) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Get p50/p95/p99 of each per-prompt latency metric for a test run.
+
+    Also includes `turn_ttft`, the time to first token over every turn of
+    every prompt. Results without timings (older rows) are ignored.
+    """
+    percentiles = ", ".join(
+        f"percentile_cont(ARRAY[0.5, 0.95, 0.99]) WITHIN GROUP (ORDER BY {metric})"
+        for metric in LATENCY_METRICS
+    )
+    with pooled_connection() as (conn, cur):
+        cur.execute(f"""
+            SELECT {percentiles}
+            FROM results
+            WHERE test_run_id = %s;
+        """, (test_run_id,))
+        row = cur.fetchone()
+        cur.execute("""
+            SELECT percentile_cont(ARRAY[0.5, 0.95, 0.99])
+                   WITHIN GROUP (ORDER BY (turn->>'ttft')::float)
+            FROM results, jsonb_array_elements(turn_timings) AS turn
+            WHERE test_run_id = %s AND turn_timings IS NOT NULL;
+        """, (test_run_id,))
+        turn_row = cur.fetchone()
+
+    stats = {}
+    for metric, values in zip(LATENCY_METRICS + ("turn_ttft",), list(row) + [turn_row[0]]):
+        values = values or [None, None, None]
+        stats[metric] = {"p50": values[0], "p95": values[1], "p99": values[2]}
+    return stats
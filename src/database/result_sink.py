@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from psycopg2.extras import Json, execute_values
+
+from .connection import pooled_connection
+
+class ResultSink:
+    """
+    Buffers result rows and writes them to the results table in batches.
+
+    Rows are flushed with a single multi-row INSERT once `batch_size` rows
+    are buffered, once `flush_interval` seconds have passed since the last
+    flush, and on close. With `background=True` flushes happen on a writer
+    thread so `add` never waits on Postgres. At most one flush window of rows
+    is lost if the process dies. Writes are upserts keyed on
+    (test_run_id, prompt_id), so writing a result again is idempotent.
+
+    Usage:
+        with ResultSink() as sink:
+            sink.add(prompt_id=1, test_run_id=2, tool_calls=[], time_taken=0.1, success_rate=True)
+    """
+
+    COLUMNS = (
+        "prompt_id",
+        "test_run_id",
+        "tool_calls",
+        "time_taken",
+        "success_rate",
+        "error_type",
+        "created_at",
+        "prompt_tokens",
+        "completion_tokens",
+        "cached_tokens",
+        "model_calls",
+        "wall_time",
+        "first_token_time",
+        "model_time",
+        "tool_time",
+        "framework_time",
+        "turn_timings",
+    )
+
+    def __init__(self, batch_size: int = 50, flush_interval: float = 5.0, background: bool = True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.background = background
+        self._rows: List[Tuple] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._last_flush = time.monotonic()
+        self._retry_after = 0.0
+        self._closed = False
+        self._writer = None
+        if background:
+            self._writer = threading.Thread(target=self._run_writer, name="result-sink", daemon=True)
+            self._writer.start()
+
+    def add(self, prompt_id: int, test_run_id: int, tool_calls: list, time_taken: float,
+            success_rate: bool, error_type: Optional[str] = None,
+            prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None,
+            cached_tokens: Optional[int] = None, model_calls: Optional[int] = None,
+            wall_time: Optional[float] = None, first_token_time: Optional[float] = None,
+            model_time: Optional[float] = None, tool_time: Optional[float] = None,
+            framework_time: Optional[float] = None, turn_timings: Optional[list] = None) -> None:
+        """Queue the result of a prompt execution for writing.
+
+        Token counts are totals over all model completions made for the
+        prompt; leave them None when the agent did not report usage. Times
+        are in seconds, with `turn_timings` holding the per-turn breakdown.
+        """
+        row = (prompt_id, test_run_id, tool_calls, time_taken, success_rate, error_type, datetime.now(),
+               prompt_tokens, completion_tokens, cached_tokens, model_calls,
+               wall_time, first_token_time, model_time, tool_time, framework_time,
+               Json(turn_timings) if turn_timings is not None else None)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ResultSink is closed")
+            self._rows.append(row)
+            due = self._flush_due()
+            if due and self.background:
+                self._wakeup.notify()
+        if due and not self.background:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all buffered rows now and return how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+                self._last_flush = time.monotonic()
+            if not rows:
+                return 0
+            try:
+                self._write(rows)
+            except Exception:
+                # Keep the rows so the next flush retries them
+                with self._lock:
+                    self._rows = rows + self._rows
+                raise
+            return len(rows)
+
+    def close(self) -> None:
+        """Stop the writer thread and flush the remaining rows."""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        if self._writer is not None:
+            self._writer.join()
+        self.flush()
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _flush_due(self) -> bool:
+        if time.monotonic() < self._retry_after:
+            return False
+        return (
+            len(self._rows) >= self.batch_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    def _run_writer(self) -> None:
+        while True:
+            with self._lock:
+                while not self._closed and not (self._rows and self._flush_due()):
+                    self._wakeup.wait(timeout=self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Error flushing results: {e}")
+                with self._lock:
+                    self._retry_after = time.monotonic() + self.flush_interval
+
+    def _write(self, rows: List[Tuple]) -> None:
+        # A prompt has one result per test run; retried writes replace it.
+        # Postgres rejects an upsert that touches the same row twice, so only
+        # the latest row per (test_run_id, prompt_id) is sent.
+        latest = {(row[1], row[0]): row for row in rows}
+        updates = ", ".join(
+            f"{column} = EXCLUDED.{column}"
+            for column in self.COLUMNS
+            if column not in ("prompt_id", "test_run_id")
+        )
+        with pooled_connection() as (conn, cur):
+            execute_values(
+                cur,
+                f"""
+                INSERT INTO results ({', '.join(self.COLUMNS)}) VALUES %s
+                ON CONFLICT (test_run_id, prompt_id) DO UPDATE SET {updates}
+                """,
+                list(latest.values()),
+                page_size=max(len(latest), 1),
+            )
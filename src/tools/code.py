@@ -1,9 +1,35 @@
 import subprocess
-import tempfile
-import os
-import sys
-from datetime import datetime
+import platform
+from functools import lru_cache
+from typing import Optional
 from src.utils.tracking import track_tool_usage
+from .typescript_service import get_typescript_service
+from .worker_pool import Execution, get_python_pool
+
+def get_version_info(lang: str) -> str:
+    if lang == "typescript":
+        # Reported by the service's workers when they start; not cached here,
+        # so a call that ends before any worker is ready does not stick
+        version = get_typescript_service().version
+        return f"Version {version}" if version else "Version unknown"
+    return probe_version(lang)
+
+@lru_cache(maxsize=None)
+def probe_version(lang: str) -> str:
+    """Probe a toolchain version once per process."""
+    if lang == "python":
+        # Snippets run on this interpreter, so no subprocess is needed
+        return f"Python {platform.python_version()}"
+    versions = {
+        "node": ["node", "--version"],
+    }
+    try:
+        cmd = versions.get(lang)
+        if cmd:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            return result.stdout.strip()
+    except:
+        return "Version unknown"
 
 @track_tool_usage
 def code_tool(code: str, language: str = "python", timeout: int = 30, **kwargs) -> str:
@@ -18,120 +44,61 @@ def code_tool(code: str, language: str = "python", timeout: int = 30, **kwargs)
     Returns:
         str: Execution results
     """
-    def get_version_info(lang: str) -> dict:
-        versions = {
-            "python": ["python", "--version"],
-            "node": ["node", "--version"],
-            "typescript": ["tsc", "--version"]
-        }
-        try:
-            cmd = versions.get(lang)
-            if cmd:
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                return result.stdout.strip()
-        except:
-            return "Version unknown"
-
-    def format_success_output(output: str, execution_time: float, lang: str) -> str:
+    def format_success_output(output: str, execution_time: float, lang: str, result: Optional[Execution]) -> str:
         return f"""
 {lang.title()} Execution Result:
 > Output: {output}
 > Execution time: {execution_time:.3f}s
-> {lang.title()} version: {get_version_info(lang)}
+{format_resource_usage(result)}> {lang.title()} version: {get_version_info(lang)}
 """
 
+    def format_resource_usage(result: Optional[Execution]) -> str:
+        lines = ""
+        if result is not None and result.cpu_time is not None:
+            lines += f"> CPU time: {result.cpu_time:.3f}s\n"
+        if result is not None and result.max_rss is not None:
+            lines += f"> Peak memory: {result.max_rss / (1024 * 1024):.1f} MB\n"
+        return lines
+
     def format_error_output(error: str, lang: str) -> str:
         return f"""
 {lang.title()} Execution Error:
 > Error: {error}
 """
 
-    def execute_python(code: str, timeout: int) -> tuple[str, float]:
-        start_time = datetime.now()
+    def execute_python(code: str, timeout: int) -> tuple[str, float, Optional[Execution]]:
         try:
-            # Create a temporary file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-                f.write(code)
-                temp_file = f.name
-
-            # Execute in a subprocess with timeout
-            result = subprocess.run(
-                [sys.executable, temp_file],
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-            
-            execution_time = (datetime.now() - start_time).total_seconds()
-            
-            if result.stderr:
-                return format_error_output(result.stderr, "python"), execution_time
-            return result.stdout, execution_time
-            
-        except subprocess.TimeoutExpired:
-            return "Execution timed out", timeout
+            result = get_python_pool().execute({"code": code}, timeout)
         except Exception as e:
-            return str(e), 0
-        finally:
-            # Cleanup
-            if 'temp_file' in locals():
-                os.unlink(temp_file)
+            return format_error_output(str(e), "python"), 0, None
 
-    def execute_typescript(code: str, timeout: int) -> tuple[str, float]:
-        start_time = datetime.now()
-        try:
-            # Create temporary TypeScript file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.ts', delete=False) as f:
-                f.write(code)
-                temp_file = f.name
-
-            # Compile TypeScript
-            compile_result = subprocess.run(
-                ['tsc', temp_file],
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-
-            if compile_result.stderr:
-                return format_error_output(compile_result.stderr, "typescript"), 0
+        if result.timed_out:
+            return "Execution timed out", timeout, None
+        if result.stderr:
+            return format_error_output(result.stderr, "python"), result.execution_time, result
+        return result.stdout, result.execution_time, result
 
-            # Execute compiled JavaScript
-            js_file = temp_file.replace('.ts', '.js')
-            result = subprocess.run(
-                ['node', js_file],
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-            
-            execution_time = (datetime.now() - start_time).total_seconds()
-            
-            if result.stderr:
-                return format_error_output(result.stderr, "typescript"), execution_time
-            return result.stdout, execution_time
-
-        except subprocess.TimeoutExpired:
-            return "Execution timed out", timeout
+    def execute_typescript(code: str, timeout: int) -> tuple[str, float, Optional[Execution]]:
+        try:
+            result = get_typescript_service().execute(code, timeout)
         except Exception as e:
-            return str(e), 0
-        finally:
-            # Cleanup
-            if 'temp_file' in locals():
-                os.unlink(temp_file)
-                js_file = temp_file.replace('.ts', '.js')
-                if os.path.exists(js_file):
-                    os.unlink(js_file)
+            return format_error_output(str(e), "typescript"), 0, None
+
+        if result.timed_out:
+            return "Execution timed out", timeout, None
+        if result.stderr:
+            return format_error_output(result.stderr, "typescript"), result.execution_time, result
+        return result.stdout, result.execution_time, result
 
     # Execute code based on language
     language = language.lower()
     if language == "python":
-        output, execution_time = execute_python(code, timeout)
+        output, execution_time, result = execute_python(code, timeout)
     elif language == "typescript":
-        output, execution_time = execute_typescript(code, timeout)
+        output, execution_time, result = execute_typescript(code, timeout)
     else:
         return f"Unsupported language: {language}. Supported languages: python, typescript"
 
     if "Error:" in output:
         return output
-    return format_success_output(output, execution_time, language)
\ No newline at end of file
+    return format_success_output(output, execution_time, language, result)
\ No newline at end of file
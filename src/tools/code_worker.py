@@ -0,0 +1,143 @@
+"""
+Long-lived Python interpreter that runs code_tool snippets sent over a pipe.
+Each snippet runs in a child forked from it, so snippets cannot affect each
+other or the worker.
+
+Started by `worker_pool.WorkerPool` as `python -I code_worker.py <request fd> <reply fd>`.
+Requests and replies are length-prefixed JSON messages on those two pipes.
+The worker's own stdout and stderr are the snippet's output streams, so the
+pool reads them exactly as it would read a one-off subprocess. Only the
+standard library may be imported here.
+"""
+
+import json
+import os
+import resource
+import struct
+import sys
+import traceback
+import types
+
+HEADER = struct.Struct(">I")
+
+
+def read_message(fd: int):
+    header = read_exactly(fd, HEADER.size)
+    if header is None:
+        return None
+    body = read_exactly(fd, HEADER.unpack(header)[0])
+    return None if body is None else json.loads(body)
+
+
+def read_exactly(fd: int, size: int):
+    data = b""
+    while len(data) < size:
+        chunk = os.read(fd, size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def write_message(fd: int, message: dict) -> None:
+    body = json.dumps(message).encode()
+    os.write(fd, HEADER.pack(len(body)) + body)
+
+
+def report_exit(code) -> int:
+    """Mirror how the interpreter reports SystemExit and return the exit status."""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def set_soft_limit(limit: int, soft: int) -> None:
+    hard = resource.getrlimit(limit)[1]
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(limit, (soft, hard))
+
+
+def run(code: str, cpu_seconds: int = None, memory_bytes: int = None, protocol_fds=()) -> dict:
+    """
+    Execute `code` in a child forked from this interpreter and wait for it.
+
+    The child starts with the worker's imports already done, but nothing it
+    changes (builtins, sys.stdout, threads, module state) outlives it. Its
+    rlimits apply to the snippet alone: overrunning RLIMIT_CPU kills it with
+    SIGXCPU, and allocations beyond RLIMIT_AS raise MemoryError.
+
+    Returns the exit status (negative for a signal), the CPU time the snippet
+    used, including child processes it waited for, and its peak resident
+    memory in bytes.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            for fd in protocol_fds:
+                os.close(fd)
+            if cpu_seconds:
+                set_soft_limit(resource.RLIMIT_CPU, cpu_seconds)
+            if memory_bytes:
+                set_soft_limit(resource.RLIMIT_AS, memory_bytes)
+            status = execute(code)
+        finally:
+            os._exit(status)
+    _, wait_status, usage = os.wait4(pid, 0)
+    return {
+        "status": os.waitstatus_to_exitcode(wait_status),
+        "cpu_time": usage.ru_utime + usage.ru_stime,
+        "max_rss": usage.ru_maxrss * 1024,
+    }
+
+
+def execute(code: str) -> int:
+    """Execute `code` as a fresh __main__ module and return its exit status."""
+    main = types.ModuleType("__main__")
+    main.__builtins__ = __builtins__
+    sys.modules["__main__"] = main
+    sys.argv[:] = ["-c"]
+    try:
+        exec(compile(code, "<snippet>", "exec"), main.__dict__)
+        return 0
+    except SystemExit as e:
+        return report_exit(e.code)
+    except BaseException as e:
+        # Drop this frame so the traceback starts at the snippet
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        return 1
+    finally:
+        # The snippet may have replaced the streams; flush the real ones
+        for stream in (sys.stdout, sys.stderr, sys.__stdout__, sys.__stderr__):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+
+
+def main():
+    requests, replies = int(sys.argv[1]), int(sys.argv[2])
+    # Keep the protocol pipes out of processes a snippet starts
+    os.set_inheritable(requests, False)
+    os.set_inheritable(replies, False)
+    write_message(replies, {"ready": True})
+    while True:
+        request = read_message(requests)
+        if request is None:
+            return
+        write_message(replies, run(
+            request["code"],
+            cpu_seconds=request.get("cpu_seconds"),
+            memory_bytes=request.get("memory_bytes"),
+            protocol_fds=(requests, replies),
+        ))
+
+
+if __name__ == "__main__":
+    main()
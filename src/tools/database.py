@@ -1,12 +1,95 @@
-from typing import Dict, List
+import base64
+import hashlib
+import os
+import sqlite3
+from typing import List, Optional, Sequence, Tuple
 from src.utils.tracking import track_tool_usage
+from .sql_engine import get_sql_engine
+
+# Budget for one page of results; roughly four characters per prompt token
+MAX_RESULT_CHARS = int(os.getenv("DATABASE_TOOL_MAX_CHARS", "4000"))
+MAX_COLUMN_WIDTH = int(os.getenv("DATABASE_TOOL_MAX_COLUMN_WIDTH", "40"))
+
+def query_digest(query: str) -> str:
+    return hashlib.sha256(" ".join(query.split()).encode()).hexdigest()[:12]
+
+def encode_cursor(query: str, offset: int) -> str:
+    """Opaque token for the page of `query` starting at row `offset`."""
+    return base64.urlsafe_b64encode(f"{offset}:{query_digest(query)}".encode()).decode().rstrip("=")
+
+def decode_cursor(query: str, cursor: str) -> int:
+    """Return the row offset a cursor points to, checking it belongs to `query`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset, digest = base64.urlsafe_b64decode(padded).decode().split(":")
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if digest != query_digest(query) or offset < 0:
+        raise ValueError("Cursor does not belong to this query")
+    return offset
+
+def format_cell(value, width: Optional[int] = None) -> str:
+    text = "NULL" if value is None else str(value).replace("\n", "\\n")
+    if width is not None and len(text) > width:
+        return text[:width - 3] + "..."
+    return text
+
+def format_select_results(columns: Sequence[str], rows: Sequence[tuple], offset: int = 0,
+                          more: bool = False, query: str = "",
+                          max_chars: int = MAX_RESULT_CHARS,
+                          max_column_width: int = MAX_COLUMN_WIDTH) -> Tuple[str, int]:
+    """
+    Format one page of a result set as a text table.
+
+    Columns are as wide as their longest value on the page, capped at
+    `max_column_width`. Rows are added until the table would exceed
+    `max_chars`; at least one row is always shown. When rows are left over,
+    either cut here or not fetched (`more`), the footer carries a cursor for
+    the next page.
+
+    Returns:
+        The table and the number of rows it shows.
+    """
+    if not rows:
+        return ("No results found" if offset == 0 else "No more rows"), 0
+
+    widths = [min(len(column), max_column_width) for column in columns]
+    cells: List[List[str]] = []
+    for row in rows:
+        cells.append([format_cell(value, max_column_width) for value in row])
+        widths = [max(width, len(cell)) for width, cell in zip(widths, cells[-1])]
+
+    header = " | ".join(format_cell(column, width).ljust(width) for column, width in zip(columns, widths))
+    lines = [header.rstrip(), "-+-".join("-" * width for width in widths)]
+    size = len(header) * 2 + 2
+    shown = 0
+    for row in cells:
+        line = " | ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+        if shown and size + len(line) + 1 > max_chars:
+            break
+        lines.append(line)
+        size += len(line) + 1
+        shown += 1
+
+    if shown < len(rows) or more:
+        cursor = encode_cursor(query, offset + shown)
+        lines.append(
+            f"Rows {offset + 1}-{offset + shown}; more rows available. "
+            f"Call database_tool again with the same query and cursor=\"{cursor}\" for the next page."
+        )
+    elif offset:
+        lines.append(f"Rows {offset + 1}-{offset + shown}; no more rows")
+    else:
+        lines.append(f"Total rows: {shown}")
+    return "\n".join(lines), shown
 
 @track_tool_usage
-def database_tool(query: str, **kwargs) -> str:
+def database_tool(query: str, cursor: Optional[str] = None, **kwargs) -> str:
     """
     Executes a SQL query on the database.
 
-    Available columns:
+    The `users` table has these columns:
     - `user_id`
     - `number_of_posts`
     - `registered_at`
@@ -17,85 +100,32 @@ def database_tool(query: str, **kwargs) -> str:
     - `gender`
     - `engagement_score`
 
+    Large results are returned a page at a time. To get the next page, call
+    again with the same query and the cursor given at the end of the result.
+
     Args:
         query (str): The SQL query to execute.
+        cursor (str, optional): Continuation cursor from a previous result.
 
     Returns:
         str: database query results
     """
-    # Structured mock data for internal use
-    structured_data = {
-        "users": [
-            {
-                "user_id": 1,
-                "number_of_posts": 156,
-                "registered_at": "2023-01-15T10:30:00",
-                "last_login": "2024-03-10T15:45:00",
-                "country": "USA",
-                "city": "Seattle",
-                "language": "en",
-                "gender": "F",
-                "engagement_score": 0.85
-            },
-            {
-                "user_id": 2,
-                "number_of_posts": 89,
-                "registered_at": "2023-03-20T14:20:00",
-                "last_login": "2024-03-09T11:30:00",
-                "country": "Canada",
-                "city": "Toronto",
-                "language": "en",
-                "gender": "M",
-                "engagement_score": 0.72
-            },
-            {
-                "user_id": 3,
-                "number_of_posts": 234,
-                "registered_at": "2023-02-01T09:15:00",
-                "last_login": "2024-03-10T16:20:00",
-                "country": "UK",
-                "city": "London",
-                "language": "en",
-                "gender": "M",
-                "engagement_score": 0.93
-            }
-        ]
-    }
-
-    # Format SELECT results as table
-    def format_select_results(data: List[Dict]) -> str:
-        if not data:
-            return "No results found"
-            
-        # Get all columns from first row
-        columns = list(data[0].keys())
-        
-        # Create header
-        header = " | ".join(f"{col:15}" for col in columns)
-        separator = "-" * len(header)
-        
-        # Create rows
-        rows = []
-        for row in data:
-            formatted_row = " | ".join(f"{str(row[col]):15}" for col in columns)
-            rows.append(formatted_row)
-            
-        return f"{header}\n{separator}\n" + "\n".join(rows) + f"\nTotal rows: {len(data)}"
-
-    # Mock query responses
-    mock_results = {
-        "SELECT": format_select_results(structured_data["users"]),
-        "INSERT": "Insert: Successfully inserted",
-        "UPDATE": "Update: Successfully updated",
-        "DELETE": "Delete: Successfully deleted",
-        "error": "Error: Invalid SQL query syntax"
-    }
-
-    # Determine query type from the first word
-    query_type = query.strip().upper().split()[0]
-    
-    # Return result based on query type
-    return mock_results.get(
-        query_type,
-        f"Invalid query type. Available types: {', '.join(mock_results.keys())}"
-    )
\ No newline at end of file
+    if not query.strip():
+        return "Error: Empty SQL query"
+    try:
+        offset = decode_cursor(query, cursor) if cursor else 0
+    except ValueError as e:
+        return f"Error: {e}"
+    try:
+        result = get_sql_engine().execute(query, offset=offset)
+    except (sqlite3.Error, sqlite3.Warning) as e:
+        return f"Error: {e}"
+
+    if result.columns is None:
+        query_type = query.strip().split()[0].title()
+        return f"{query_type}: Successfully executed ({result.rowcount} rows affected)"
+
+    output, _ = format_select_results(
+        result.columns, result.rows, offset=offset, more=result.truncated, query=query
+    )
+    return output
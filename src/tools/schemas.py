@@ -3,6 +3,7 @@ from typing import List, Optional, Union, Dict
 
 class DatabaseToolParams(BaseModel):
     query: str = Field(..., description="The SQL query to execute")
+    cursor: Optional[str] = Field(None, description="Cursor from a previous result of the same query, to fetch its next page")
 
 class StatisticalAnalysisToolParams(BaseModel):
     data: List[Union[int, float, Dict]] = Field(..., description="List of numerical data points to analyze")
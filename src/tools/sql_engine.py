@@ -0,0 +1,264 @@
+"""
+Embedded SQLite database behind database_tool.
+
+Holds a generated `users` table with the columns database_tool documents, so
+queries do real work and tool latency follows query cost. The table is
+built once per (rows, seed) into DATABASE_TOOL_PATH and reused by later runs
+and other processes; `python -m scripts.build_tool_database` builds it ahead
+of time.
+"""
+
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+DEFAULT_DATABASE_PATH = os.path.join(".tool_database", "users.sqlite3")
+DATABASE_PATH = os.getenv("DATABASE_TOOL_PATH", DEFAULT_DATABASE_PATH)
+DATABASE_ROWS = int(os.getenv("DATABASE_TOOL_ROWS", "10000"))
+DATABASE_SEED = int(os.getenv("DATABASE_TOOL_SEED", "42"))
+# Rows returned per query; the rest of a result set is never fetched
+DATABASE_MAX_ROWS = int(os.getenv("DATABASE_TOOL_MAX_ROWS", "100"))
+DATABASE_TIMEOUT = float(os.getenv("DATABASE_TOOL_TIMEOUT", "10"))
+DATABASE_READ_ONLY = os.getenv("DATABASE_TOOL_READ_ONLY", "true").lower() in ("1", "true", "yes")
+# Prepared statements (and their query plans) kept per connection
+STATEMENT_CACHE_SIZE = int(os.getenv("DATABASE_TOOL_STATEMENT_CACHE", "256"))
+
+# Bump when the generated data changes so existing files are rebuilt
+SCHEMA_VERSION = 1
+# SQLite VM instructions between checks of the query deadline
+PROGRESS_INTERVAL = 10_000
+INSERT_BATCH_SIZE = 10_000
+# Rows read at a time while skipping to a page
+SKIP_BATCH_SIZE = 10_000
+
+USERS_TABLE = """
+CREATE TABLE users (
+    user_id INTEGER PRIMARY KEY,
+    number_of_posts INTEGER NOT NULL,
+    registered_at TEXT NOT NULL,
+    last_login TEXT NOT NULL,
+    country TEXT NOT NULL,
+    city TEXT NOT NULL,
+    language TEXT NOT NULL,
+    gender TEXT NOT NULL,
+    engagement_score REAL NOT NULL
+)
+"""
+
+INDEXED_COLUMNS = [
+    "country",
+    "city",
+    "language",
+    "registered_at",
+    "last_login",
+    "number_of_posts",
+    "engagement_score",
+]
+
+# (country, weight, cities, languages)
+LOCATIONS = [
+    ("USA", 30, ["Seattle", "New York", "San Francisco", "Austin", "Chicago"], ["en", "es"]),
+    ("India", 14, ["Mumbai", "Bangalore", "Delhi"], ["en", "hi"]),
+    ("UK", 10, ["London", "Manchester", "Edinburgh"], ["en"]),
+    ("Canada", 8, ["Toronto", "Vancouver", "Montreal"], ["en", "fr"]),
+    ("Germany", 8, ["Berlin", "Munich", "Hamburg"], ["de"]),
+    ("Brazil", 8, ["Sao Paulo", "Rio de Janeiro"], ["pt"]),
+    ("France", 7, ["Paris", "Lyon"], ["fr"]),
+    ("Japan", 6, ["Tokyo", "Osaka"], ["ja"]),
+    ("Spain", 5, ["Madrid", "Barcelona"], ["es"]),
+    ("Australia", 4, ["Sydney", "Melbourne"], ["en"]),
+]
+GENDERS = ["F", "M", "X"]
+GENDER_WEIGHTS = [48, 48, 4]
+FIRST_REGISTRATION = datetime(2020, 1, 1)
+LAST_ACTIVITY = datetime(2024, 3, 15)
+
+
+def generate_users(rows: int, seed: int) -> Iterator[Tuple]:
+    """Yield `rows` deterministic user rows in column order."""
+    rng = random.Random(seed)
+    span = int((LAST_ACTIVITY - FIRST_REGISTRATION).total_seconds())
+    weights = [location[1] for location in LOCATIONS]
+    for user_id in range(1, rows + 1):
+        country, _, cities, languages = rng.choices(LOCATIONS, weights)[0]
+        registered = int(span * rng.random() ** 0.7)
+        last_login = registered + int((span - registered) * rng.random() ** 0.3)
+        yield (
+            user_id,
+            int(rng.expovariate(1 / 80)),
+            (FIRST_REGISTRATION + timedelta(seconds=registered)).isoformat(),
+            (FIRST_REGISTRATION + timedelta(seconds=last_login)).isoformat(),
+            country,
+            rng.choice(cities),
+            rng.choice(languages),
+            rng.choices(GENDERS, GENDER_WEIGHTS)[0],
+            round(rng.betavariate(2, 3), 2),
+        )
+
+
+def dataset_matches(path: str, rows: int, seed: int) -> bool:
+    if not os.path.exists(path):
+        return False
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            found = conn.execute("SELECT rows, seed, version FROM dataset").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return found == (rows, seed, SCHEMA_VERSION)
+
+
+def build_database(path: str = DATABASE_PATH, rows: int = DATABASE_ROWS, seed: int = DATABASE_SEED,
+                   force: bool = False) -> bool:
+    """
+    Generate the users table at `path` unless a matching one exists.
+
+    The file is written next to `path` and moved into place when complete,
+    so concurrent processes never see a partial database.
+
+    Returns:
+        True if the database was built, False if it was already there.
+    """
+    if not force and dataset_matches(path, rows, seed):
+        return False
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    partial = f"{path}.{os.getpid()}.{threading.get_ident()}.partial"
+    started = time.perf_counter()
+    conn = sqlite3.connect(partial)
+    try:
+        # Nothing to protect until the file is moved into place
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute(USERS_TABLE)
+        users = generate_users(rows, seed)
+        insert = "INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        while True:
+            batch = [row for _, row in zip(range(INSERT_BATCH_SIZE), users)]
+            if not batch:
+                break
+            conn.executemany(insert, batch)
+        for column in INDEXED_COLUMNS:
+            conn.execute(f"CREATE INDEX idx_users_{column} ON users ({column})")
+        conn.execute("CREATE TABLE dataset (rows INTEGER, seed INTEGER, version INTEGER)")
+        conn.execute("INSERT INTO dataset VALUES (?, ?, ?)", (rows, seed, SCHEMA_VERSION))
+        conn.commit()
+        # Planner statistics, so the indexes are used where they help
+        conn.execute("ANALYZE")
+        conn.commit()
+    except BaseException:
+        conn.close()
+        os.unlink(partial)
+        raise
+    conn.close()
+    os.replace(partial, path)
+    logging.info(f"Built {rows} user rows in {path} in {time.perf_counter() - started:.1f}s")
+    return True
+
+
+class QueryResult(NamedTuple):
+    """Outcome of one statement: `columns` and `rows` for queries, `rowcount` for writes."""
+    columns: Optional[List[str]]
+    rows: List[tuple]
+    truncated: bool
+    rowcount: int
+
+
+class SQLEngine:
+    """
+    Runs database_tool queries against the generated database.
+
+    Each thread gets its own connection, with SQLite's statement cache
+    sized to `statement_cache`, so a repeated query skips parsing and
+    planning. Result sets are fetched only up to `max_rows`. A query running
+    longer than `timeout` seconds is interrupted. In read-only mode the file
+    is opened read-only and writes fail. Otherwise writes are committed and
+    change the data later queries see.
+    """
+
+    def __init__(self, path: str = DATABASE_PATH, rows: int = DATABASE_ROWS, seed: int = DATABASE_SEED,
+                 max_rows: int = DATABASE_MAX_ROWS, timeout: float = DATABASE_TIMEOUT,
+                 read_only: bool = DATABASE_READ_ONLY, statement_cache: int = STATEMENT_CACHE_SIZE):
+        build_database(path, rows, seed)
+        self.path = path
+        self.max_rows = max_rows
+        self.timeout = timeout
+        self.read_only = read_only
+        self.statement_cache = statement_cache
+        self._local = threading.local()
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            mode = "ro" if self.read_only else "rw"
+            conn = sqlite3.connect(
+                f"file:{self.path}?mode={mode}",
+                uri=True,
+                cached_statements=self.statement_cache,
+            )
+            if self.read_only:
+                conn.execute("PRAGMA query_only = ON")
+            self._local.conn = conn
+        return conn
+
+    def execute(self, query: str, offset: int = 0) -> QueryResult:
+        """
+        Run a single SQL statement.
+
+        For queries, the first `offset` rows are skipped as they are read,
+        then up to `max_rows` are returned.
+
+        Raises:
+            sqlite3.Error: If the statement is invalid, writes in read-only
+                mode or runs past the timeout (sqlite3.OperationalError:
+                interrupted).
+        """
+        conn = self.connection()
+        deadline = time.monotonic() + self.timeout
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_INTERVAL)
+        try:
+            cursor = conn.execute(query)
+            try:
+                if cursor.description is None:
+                    result = QueryResult(None, [], False, cursor.rowcount)
+                else:
+                    columns = [column[0] for column in cursor.description]
+                    while offset > 0 and cursor.fetchmany(min(offset, SKIP_BATCH_SIZE)):
+                        offset -= SKIP_BATCH_SIZE
+                    rows = cursor.fetchmany(self.max_rows + 1)
+                    truncated = len(rows) > self.max_rows
+                    del rows[self.max_rows:]
+                    result = QueryResult(columns, rows, truncated, len(rows))
+            finally:
+                cursor.close()
+            # Writes with RETURNING have rows too; commit whatever the statement opened
+            if conn.in_transaction:
+                conn.commit()
+            return result
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            conn.set_progress_handler(None, 0)
+
+
+_engine: Optional[SQLEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_sql_engine() -> SQLEngine:
+    """Return the shared engine, building the database on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = SQLEngine()
+    return _engine
@@ -0,0 +1,206 @@
+// Long-lived Node.js process that transpiles and runs code_tool TypeScript snippets.
+//
+// Speaks the same protocol as code_worker.py: started as
+// `node ts_worker.js <request fd> <reply fd>`, it exchanges length-prefixed
+// JSON messages on those pipes while its stdout and stderr carry the
+// snippet's output. A request holds either {"typescript": source}, which is
+// transpiled in memory, or {"javascript": source} already transpiled by an
+// earlier request. A snippet counts as finished once the event loop has no
+// work left, as when `node` runs a file; the reply then carries its exit
+// status, CPU time and the process's peak RSS and, after a transpile, the
+// JavaScript so the caller can cache it. The peak RSS is a lifetime figure,
+// so a snippet that raises it noticeably asks for the worker to be retired.
+// The figure each later snippet reports then covers only that snippet and
+// the worker's startup, give or take RETIRE_PEAK_GROWTH.
+//
+// Each snippet runs in a fresh vm context, so globals and built-in
+// prototypes it changes are gone for the next one. Node's own globals
+// (process, Buffer, timers, ...) and required modules are shared with the
+// worker; a snippet that changes process, its environment, the working
+// directory or the module cache asks for the worker to be retired too.
+
+"use strict";
+
+const fs = require("fs");
+const net = require("net");
+const path = require("path");
+const vm = require("vm");
+const { Console } = require("console");
+const { createRequire } = require("module");
+const { execFileSync } = require("child_process");
+
+const HEADER_SIZE = 4;
+// Peak RSS growth (KiB) that retires a worker; smaller growth is normal warm-up
+const RETIRE_PEAK_GROWTH = 32 * 1024;
+const SNIPPET_FILE = path.join(process.cwd(), "snippet.js");
+// Globals Node adds on top of the language's own, lent to each snippet context
+const NODE_GLOBALS = Object.getOwnPropertyNames(globalThis).filter(
+  (name) => !(name in vm.runInContext("globalThis", vm.createContext())),
+);
+
+function loadTypeScript() {
+  try {
+    return require("typescript");
+  } catch (localError) {
+    // Fall back to a global `npm install -g typescript`
+    try {
+      const globalRoot = execFileSync("npm", ["root", "-g"], { encoding: "utf8" }).trim();
+      return require(path.join(globalRoot, "typescript"));
+    } catch (globalError) {
+      return { error: localError.message };
+    }
+  }
+}
+
+const ts = loadTypeScript();
+const compilerOptions = ts.error ? null : {
+  module: ts.ModuleKind.CommonJS,
+  target: ts.ScriptTarget.ES2020,
+  esModuleInterop: true,
+};
+const formatHost = {
+  getCanonicalFileName: (fileName) => fileName,
+  getCurrentDirectory: () => process.cwd(),
+  getNewLine: () => "\n",
+};
+
+const replies = Number(process.argv[3]);
+const requests = new net.Socket({ fd: Number(process.argv[2]), readable: true, writable: false });
+let pending = Buffer.alloc(0);
+let current = null;
+// Built while the worker is idle, so a request does not wait for its context
+let spareContext = null;
+
+function writeMessage(message) {
+  const body = Buffer.from(JSON.stringify(message));
+  const header = Buffer.alloc(HEADER_SIZE);
+  header.writeUInt32BE(body.length);
+  fs.writeSync(replies, Buffer.concat([header, body]));
+}
+
+function nextMessage() {
+  if (pending.length < HEADER_SIZE) {
+    return null;
+  }
+  const size = pending.readUInt32BE(0);
+  if (pending.length < HEADER_SIZE + size) {
+    return null;
+  }
+  const body = pending.subarray(HEADER_SIZE, HEADER_SIZE + size);
+  pending = pending.subarray(HEADER_SIZE + size);
+  return JSON.parse(body.toString());
+}
+
+function transpile(source) {
+  if (ts.error) {
+    throw new Error(`TypeScript is not installed: ${ts.error}`);
+  }
+  const output = ts.transpileModule(source, {
+    compilerOptions,
+    fileName: "snippet.ts",
+    reportDiagnostics: true,
+  });
+  if (output.diagnostics && output.diagnostics.length) {
+    return { diagnostics: ts.formatDiagnostics(output.diagnostics, formatHost) };
+  }
+  return { javascript: output.outputText };
+}
+
+function snippetContext() {
+  const context = vm.createContext();
+  const snippetGlobal = vm.runInContext("globalThis", context);
+  for (const name of NODE_GLOBALS) {
+    Object.defineProperty(snippetGlobal, name, Object.getOwnPropertyDescriptor(globalThis, name));
+  }
+  snippetGlobal.global = snippetGlobal;
+  // A context's built-in console prints nothing
+  snippetGlobal.console = new Console(process.stdout, process.stderr);
+  return context;
+}
+
+function takeContext() {
+  const context = spareContext || snippetContext();
+  spareContext = null;
+  return context;
+}
+
+function sharedState() {
+  return JSON.stringify([
+    Object.keys(process),
+    process.env,
+    process.cwd(),
+    Object.keys(require.cache),
+  ]);
+}
+
+function run(request) {
+  current = {
+    status: 0,
+    cpu: process.cpuUsage(),
+    peak: process.resourceUsage().maxRSS,
+    shared: sharedState(),
+  };
+  let javascript = request.javascript;
+  try {
+    if (javascript === undefined) {
+      const output = transpile(request.typescript);
+      if (output.diagnostics) {
+        process.stderr.write(output.diagnostics);
+        current.status = 1;
+        return;
+      }
+      javascript = current.javascript = output.javascript;
+    }
+    const snippet = vm.compileFunction(
+      javascript,
+      ["exports", "require", "module", "__filename", "__dirname"],
+      { filename: SNIPPET_FILE, parsingContext: takeContext() },
+    );
+    const module = { exports: {} };
+    snippet(module.exports, createRequire(SNIPPET_FILE), module, SNIPPET_FILE, process.cwd());
+  } catch (error) {
+    process.stderr.write(`${(error && error.stack) || error}\n`);
+    current.status = 1;
+  }
+}
+
+requests.on("data", (chunk) => {
+  pending = Buffer.concat([pending, chunk]);
+  const request = nextMessage();
+  if (request !== null) {
+    // Let the loop drain once the snippet's own timers and I/O are done
+    requests.unref();
+    run(request);
+  }
+});
+
+requests.on("end", () => process.exit(0));
+
+process.on("beforeExit", () => {
+  if (current === null) {
+    return;
+  }
+  const cpu = process.cpuUsage(current.cpu);
+  const peak = process.resourceUsage().maxRSS;
+  const reply = {
+    status: process.exitCode || current.status,
+    cpu_time: (cpu.user + cpu.system) / 1e6,
+    max_rss: peak * 1024,
+    retire: peak - current.peak > RETIRE_PEAK_GROWTH || sharedState() !== current.shared,
+  };
+  if (current.javascript !== undefined) {
+    reply.javascript = current.javascript;
+  }
+  process.exitCode = 0;
+  current = null;
+  writeMessage(reply);
+  requests.ref();
+  spareContext = snippetContext();
+});
+
+writeMessage({
+  ready: true,
+  node: process.version,
+  typescript: ts.error ? null : ts.version,
+});
+spareContext = snippetContext();
@@ -0,0 +1,84 @@
+import atexit
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from .worker_pool import CODE_MEMORY_MB, CODE_WORKER_MAX_EXECUTIONS, CODE_WORKERS, Execution, WorkerPool
+
+TS_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ts_worker.js")
+TRANSPILE_CACHE_SIZE = int(os.getenv("CODE_TOOL_TRANSPILE_CACHE_SIZE", "256"))
+
+
+class TypeScriptService:
+    """
+    Transpiles and runs TypeScript snippets in warm Node.js workers.
+
+    Workers load the TypeScript compiler once and transpile each snippet in
+    memory with `transpileModule`, so a snippet costs neither a `tsc` nor a
+    `node` startup. Only syntax errors are reported; types are not checked.
+    Each snippet gets a fresh vm context, so globals it sets do not reach
+    later snippets on the same worker.
+    The JavaScript of recent snippets is cached here, keyed by a hash of the
+    source, so it survives worker recycling and a repeated snippet is not
+    transpiled again. CODE_TOOL_MEMORY_MB caps each worker's V8 heap; CPU
+    time is reported but only bounded by the execution timeout.
+    """
+
+    def __init__(self, size: int, max_executions: int, cache_size: int = TRANSPILE_CACHE_SIZE):
+        command = ["node", TS_WORKER_SCRIPT]
+        if CODE_MEMORY_MB:
+            command.insert(1, f"--max-old-space-size={CODE_MEMORY_MB}")
+        self.pool = WorkerPool(command, size, max_executions)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> Optional[str]:
+        """The TypeScript version reported by the workers, once one has started."""
+        return (self.pool.info or {}).get("typescript")
+
+    def execute(self, code: str, timeout: Optional[float]) -> Execution:
+        key = hashlib.sha256(code.encode()).hexdigest()
+        with self._lock:
+            javascript = self._cache.get(key)
+            if javascript is not None:
+                self._cache.move_to_end(key)
+        request = {"typescript": code} if javascript is None else {"javascript": javascript}
+
+        result = self.pool.execute(request, timeout)
+        if result.reply and "javascript" in result.reply and self.cache_size > 0:
+            with self._lock:
+                self._cache[key] = result.reply["javascript"]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+_service: Optional[TypeScriptService] = None
+_service_lock = threading.Lock()
+
+
+def get_typescript_service() -> TypeScriptService:
+    """Return the shared TypeScript service, starting its workers on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = TypeScriptService(CODE_WORKERS, CODE_WORKER_MAX_EXECUTIONS)
+                atexit.register(close_typescript_service)
+    return _service
+
+
+def close_typescript_service() -> None:
+    """Stop every worker of the shared service."""
+    global _service
+    with _service_lock:
+        if _service is not None:
+            _service.close()
+            _service = None
@@ -0,0 +1,372 @@
+import atexit
+import json
+import os
+import selectors
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from .code_worker import HEADER
+
+CODE_WORKERS = int(os.getenv("CODE_TOOL_WORKERS", "2"))
+CODE_WORKER_MAX_EXECUTIONS = int(os.getenv("CODE_TOOL_MAX_EXECUTIONS", "100"))
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "code_worker.py")
+PYTHON_WORKER_COMMAND = [sys.executable, "-I", WORKER_SCRIPT]
+READ_SIZE = 65536
+# Output kept per stream and execution; the middle of longer output is dropped
+CODE_OUTPUT_LIMIT = int(os.getenv("CODE_TOOL_MAX_OUTPUT_BYTES", "32768"))
+# Optional per-execution CPU time and per-interpreter memory limits
+CODE_CPU_SECONDS = int(os.getenv("CODE_TOOL_CPU_SECONDS", "0")) or None
+CODE_MEMORY_MB = int(os.getenv("CODE_TOOL_MEMORY_MB", "0")) or None
+
+TRUNCATED_OUTPUT = "\n... [{bytes} bytes of output truncated] ...\n"
+
+
+class OutputCapture:
+    """
+    Bounded capture of one output stream.
+
+    Keeps the first and the last `limit // 2` bytes and counts what falls in
+    between, so memory stays fixed however much a snippet prints.
+    """
+
+    def __init__(self, limit: int):
+        self.head_limit = limit // 2
+        self.tail_limit = limit - self.head_limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.dropped = 0
+
+    def append(self, data: bytes) -> None:
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if not data:
+            return
+        self.tail += data
+        overflow = len(self.tail) - self.tail_limit
+        if overflow > 0:
+            del self.tail[:overflow]
+            self.dropped += overflow
+
+    def __bool__(self) -> bool:
+        return bool(self.head or self.tail)
+
+    def text(self) -> str:
+        if not self.dropped:
+            return (self.head + self.tail).decode(errors="replace")
+        return (
+            self.head.decode(errors="replace")
+            + TRUNCATED_OUTPUT.format(bytes=self.dropped)
+            + self.tail.decode(errors="replace")
+        )
+
+
+class Execution(NamedTuple):
+    stdout: str
+    stderr: str
+    status: int
+    execution_time: float
+    timed_out: bool = False
+    reply: Optional[dict] = None
+    cpu_time: Optional[float] = None
+    max_rss: Optional[int] = None
+
+
+class Worker:
+    """
+    One pre-started interpreter speaking the code_worker.py protocol.
+
+    `command` is started with the request and reply pipe descriptors as its
+    last two arguments. The worker first replies with a ready message, kept
+    as `info`, then answers each request once the snippet has finished, so
+    its stdout and stderr carry nothing but the snippet's output. A worker
+    that times out is killed; one that dies on its own is reported as
+    crashed and must be replaced. A reply with "retire" set also asks for
+    the worker to be replaced.
+    """
+
+    def __init__(self, command: List[str], output_limit: int = CODE_OUTPUT_LIMIT):
+        request_read, self._requests = os.pipe()
+        self._replies, reply_write = os.pipe()
+        try:
+            self.process = subprocess.Popen(
+                [*command, str(request_read), str(reply_write)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                pass_fds=(request_read, reply_write),
+                # Killing the group also stops a snippet the worker is running
+                start_new_session=True,
+            )
+        except BaseException:
+            os.close(self._requests)
+            os.close(self._replies)
+            raise
+        finally:
+            os.close(request_read)
+            os.close(reply_write)
+        self.output_limit = output_limit
+        self.executions = 0
+        self.ready = False
+        self.info: Optional[dict] = None
+        self.crashed = False
+        # Set when the worker asks not to be reused
+        self.retire = False
+        self._pending = bytearray()
+
+    def execute(self, request: dict, timeout: Optional[float]) -> Execution:
+        """Send one request and return its output; kills the worker if it overruns `timeout`."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        stdout = OutputCapture(self.output_limit)
+        stderr = OutputCapture(self.output_limit)
+        started = time.perf_counter()
+        reply = None
+        try:
+            # A fresh worker may still be importing; that time is not the snippet's
+            if not self.ready:
+                self.info = self._wait_for_reply(deadline, OutputCapture(0), OutputCapture(0))
+                self.ready = self.info is not None
+                started = time.perf_counter()
+            if self.ready:
+                self.executions += 1
+                self._send(request)
+                reply = self._wait_for_reply(deadline, stdout, stderr)
+        except BrokenPipeError:
+            reply = None
+        except TimeoutError:
+            self.kill()
+            return Execution("", "", -1, time.perf_counter() - started, timed_out=True)
+        execution_time = time.perf_counter() - started
+
+        if reply is None:
+            self._collect_remaining(stdout, stderr)
+            self.crashed = True
+            status = self.process.wait()
+            if status and not stderr:
+                stderr.append(exit_message(status).encode())
+            reply = {}
+        else:
+            status = reply["status"]
+            self.retire = bool(reply.get("retire"))
+            if status < 0 and not stderr:
+                stderr.append(exit_message(status).encode())
+        return Execution(
+            stdout.text(),
+            stderr.text(),
+            status,
+            execution_time,
+            reply=reply or None,
+            cpu_time=reply.get("cpu_time"),
+            max_rss=reply.get("max_rss"),
+        )
+
+    def _send(self, message: dict) -> None:
+        body = json.dumps(message).encode()
+        data = memoryview(HEADER.pack(len(body)) + body)
+        while data:
+            data = data[os.write(self._requests, data):]
+
+    def _next_reply(self) -> Optional[dict]:
+        if len(self._pending) < HEADER.size:
+            return None
+        size = HEADER.unpack_from(self._pending)[0]
+        if len(self._pending) < HEADER.size + size:
+            return None
+        body = bytes(self._pending[HEADER.size:HEADER.size + size])
+        del self._pending[:HEADER.size + size]
+        return json.loads(body)
+
+    def _wait_for_reply(self, deadline: Optional[float], stdout: OutputCapture, stderr: OutputCapture) -> Optional[dict]:
+        """
+        Read output until the worker replies.
+
+        Returns None if the worker exits first and raises TimeoutError once
+        `deadline` passes. Output is read while waiting so a chatty snippet
+        never blocks on a full pipe.
+        """
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.process.stdout.fileno(), selectors.EVENT_READ, stdout)
+            selector.register(self.process.stderr.fileno(), selectors.EVENT_READ, stderr)
+            selector.register(self._replies, selectors.EVENT_READ, None)
+            while True:
+                reply = self._next_reply()
+                if reply is not None:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError
+                for key, _ in selector.select(remaining):
+                    data = os.read(key.fd, READ_SIZE)
+                    if key.data is None:
+                        if not data:
+                            return None
+                        self._pending += data
+                    elif data:
+                        key.data.append(data)
+                    else:
+                        selector.unregister(key.fd)
+            # The worker flushes before replying, so the rest is already buffered
+            self._drain(selector, 0)
+        return reply
+
+    def _collect_remaining(self, stdout: OutputCapture, stderr: OutputCapture) -> None:
+        with selectors.DefaultSelector() as selector:
+            for stream, chunks in ((self.process.stdout, stdout), (self.process.stderr, stderr)):
+                if not stream.closed:
+                    selector.register(stream.fileno(), selectors.EVENT_READ, chunks)
+            self._drain(selector, 0.1)
+
+    @staticmethod
+    def _drain(selector: selectors.BaseSelector, timeout: float) -> None:
+        while selector.get_map():
+            events = [key for key, _ in selector.select(timeout) if key.data is not None]
+            if not events:
+                return
+            for key in events:
+                data = os.read(key.fd, READ_SIZE)
+                if data:
+                    key.data.append(data)
+                else:
+                    selector.unregister(key.fd)
+
+    def kill(self) -> None:
+        self.crashed = True
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.close()
+
+    def close(self) -> None:
+        """Stop the worker; closing its request pipe makes it exit."""
+        if self._requests < 0:
+            return
+        os.close(self._requests)
+        os.close(self._replies)
+        self._requests = self._replies = -1
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            self.process.wait()
+        self.process.stdout.close()
+        self.process.stderr.close()
+
+
+class WorkerPool:
+    """
+    Thread-safe pool of warm interpreters for code_tool.
+
+    Workers are started up front and reused, so a snippet pays neither for
+    interpreter startup nor for a temporary file. A worker is replaced after
+    `max_executions` snippets, on a timeout or when it crashes, so state
+    leaked by one snippet is short-lived. Replacements are started as soon
+    as a worker is retired so they boot while the pool is idle.
+    """
+
+    def __init__(self, command: List[str], size: int, max_executions: int,
+                 limits: Optional[Dict[str, int]] = None, output_limit: int = CODE_OUTPUT_LIMIT):
+        self.command = command
+        self.limits = limits or {}
+        self.output_limit = output_limit
+        self.info: Optional[dict] = None
+        self.size = max(size, 1)
+        self.max_executions = max(max_executions, 1)
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._idle: List[Worker] = [Worker(command, output_limit) for _ in range(self.size)]
+        self._closed = False
+
+    def execute(self, request: dict, timeout: Optional[float]) -> Execution:
+        """Run one request on an idle worker; `limits` are added to every request."""
+        self._slots.acquire()
+        try:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Worker pool is closed")
+                worker = self._idle.pop() if self._idle else None
+            if worker is None:
+                worker = Worker(self.command, self.output_limit)
+            try:
+                result = worker.execute({**self.limits, **request}, timeout)
+                self.info = worker.info or self.info
+            except BaseException:
+                worker.kill()
+                raise
+            finally:
+                if worker.crashed or worker.retire or worker.executions >= self.max_executions:
+                    worker.close()
+                    worker = Worker(self.command, self.output_limit)
+                with self._lock:
+                    if self._closed:
+                        worker.close()
+                    else:
+                        self._idle.append(worker)
+            return result
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.close()
+
+
+def exit_message(status: int) -> str:
+    if status == -signal.SIGXCPU:
+        return "CPU time limit exceeded\n"
+    if status < 0:
+        return f"Process killed by {signal.Signals(-status).name}\n"
+    return f"Process exited with code {status}\n"
+
+
+def resource_limits() -> Dict[str, int]:
+    """Limits from CODE_TOOL_CPU_SECONDS / CODE_TOOL_MEMORY_MB, as sent to Python workers."""
+    limits = {}
+    if CODE_CPU_SECONDS:
+        limits["cpu_seconds"] = CODE_CPU_SECONDS
+    if CODE_MEMORY_MB:
+        limits["memory_bytes"] = CODE_MEMORY_MB * 1024 * 1024
+    return limits
+
+
+_pool: Optional[WorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_python_pool() -> WorkerPool:
+    """
+    Return the shared Python worker pool, starting its interpreters on first use.
+
+    Each snippet runs as a fresh `__main__` module in a child forked from the
+    worker; send it as {"code": ...}.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = WorkerPool(
+                    PYTHON_WORKER_COMMAND, CODE_WORKERS, CODE_WORKER_MAX_EXECUTIONS,
+                    limits=resource_limits(),
+                )
+                atexit.register(close_python_pool)
+    return _pool
+
+
+def close_python_pool() -> None:
+    """Stop every worker of the shared pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,203 @@
+"""
+Lightweight span tracing exported as Chrome Trace Event JSONL.
+
+Spans nest run -> turn -> completion -> tool call. Each finished span is
+written as one complete ("ph": "X") trace event per line to the file named
+by TRACE_FILE (or passed to `configure_tracing`). Convert a file with
+`python -m scripts.export_trace` to open it in Perfetto or chrome://tracing.
+With no trace file configured, every call here is a cheap no-op.
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class TraceWriter:
+    """Appends trace events to a JSONL file; safe to share between threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, event: Dict[str, Any]) -> None:
+        line = json.dumps(event, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+_writer: Optional[TraceWriter] = None
+_writer_lock = threading.Lock()
+_configured = False
+
+
+def configure_tracing(path: Optional[str]) -> None:
+    """Send spans to `path`, or stop tracing when `path` is None."""
+    global _writer, _configured
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+        _writer = TraceWriter(path) if path else None
+        _configured = True
+
+
+def get_writer() -> Optional[TraceWriter]:
+    # TRACE_FILE is read on first use so a .env loaded at startup applies
+    if not _configured:
+        configure_tracing(os.getenv("TRACE_FILE"))
+    return _writer
+
+
+def tracing_enabled() -> bool:
+    """True when spans are being written; use it to skip costly attributes."""
+    return get_writer() is not None
+
+
+class Span:
+    """
+    One timed operation. Attributes are free-form and end up in the event's args.
+
+    Ending a span also ends any of its children still open, so an error that
+    skips a child's end does not lose the child.
+    """
+
+    __slots__ = ("name", "span_id", "trace_id", "parent", "attributes",
+                 "start_us", "tid", "_started", "_children", "_ended", "_writer")
+
+    def __init__(self, name: str, parent: Optional["Span"], writer: TraceWriter, attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = next(_span_ids)
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.attributes = attributes
+        self.start_us = time.time_ns() // 1000
+        self.tid = threading.get_ident()
+        self._started = time.perf_counter()
+        self._children: List[Span] = []
+        self._ended = False
+        self._writer = writer
+        if parent is not None:
+            parent._children.append(self)
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def end(self, **attributes) -> None:
+        if self._ended:
+            return
+        duration = time.perf_counter() - self._started
+        for child in list(self._children):
+            child.end()
+        self._ended = True
+        self.attributes.update(attributes)
+        self._writer.write({
+            "name": self.name,
+            "cat": self.name.split(".")[0],
+            "ph": "X",
+            "ts": self.start_us,
+            "dur": int(duration * 1_000_000),
+            "pid": os.getpid(),
+            "tid": self.tid,
+            "args": {
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent.span_id if self.parent else None,
+                **self.attributes,
+            },
+        })
+        if self.parent is not None:
+            self.parent._children.remove(self)
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is off."""
+
+    def set(self, **attributes) -> None:
+        pass
+
+    def end(self, **attributes) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, parent: Optional[Span] = None, **attributes):
+    """
+    Start a span without making it current; the caller must end it.
+
+    The parent defaults to the current span. Use this for spans that stay
+    open across a `yield`, where a context variable must not be left set.
+    """
+    writer = get_writer()
+    if writer is None:
+        return NOOP_SPAN
+    if parent is None or parent is NOOP_SPAN:
+        parent = _current_span.get()
+    return Span(name, parent, writer, attributes)
+
+
+@contextmanager
+def use_span(span) -> Iterator[None]:
+    """Make `span` the parent of spans started in this block."""
+    if span is NOOP_SPAN:
+        yield
+        return
+    token = _current_span.set(span)
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Any]:
+    """Run a block inside a new child of the current span."""
+    new_span = start_span(name, **attributes)
+    if new_span is NOOP_SPAN:
+        yield new_span
+        return
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except Exception as e:
+        new_span.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        new_span.end()
+
+
+@contextmanager
+def ending(span) -> Iterator[Any]:
+    """
+    End `span` when the block exits, recording an error if one is raised.
+
+    Unlike `span()` this does not make the span current, so the block may
+    contain a `yield`.
+    """
+    try:
+        yield span
+    except Exception as e:
+        span.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        span.end()
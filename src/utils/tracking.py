@@ -1,31 +1,112 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import wraps
-from typing import Callable, List, Dict, Any
+from typing import Callable, Iterator, List, Dict, Any, Optional
 import time
 from datetime import datetime
 
+from src.utils.tracing import span, tracing_enabled
+
+USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+TIMING_FIELDS = ("model_time", "tool_time", "framework_time")
+
+class TrackingScope:
+    """Collects the tool calls, model usage and turn timings recorded while the scope is active."""
+
+    def __init__(self):
+        self.tool_calls: List[Dict[str, Any]] = []
+        # One entry per model completion, in the order they finished
+        self.usage: List[Dict[str, Any]] = []
+        # Latency breakdown of each agent turn, in seconds
+        self.turns: List[Dict[str, Any]] = []
+
+    def usage_totals(self) -> Dict[str, int]:
+        """Token usage summed over all completions, plus the completion count."""
+        totals = {field: sum(entry[field] for entry in self.usage) for field in USAGE_FIELDS}
+        totals["completions"] = len(self.usage)
+        return totals
+
+    def timing_totals(self) -> Dict[str, Optional[float]]:
+        """Model, tool and framework time summed over all turns, plus the first turn's TTFT."""
+        totals = {field: sum(turn[field] for turn in self.turns) for field in TIMING_FIELDS}
+        totals["first_token_time"] = self.turns[0]["ttft"] if self.turns else None
+        return totals
+
+_current_scope: ContextVar[Optional[TrackingScope]] = ContextVar("tool_tracking_scope", default=None)
+
 class ToolTracker:
+    """
+    Records tool calls into the active tracking scope.
+
+    Open a scope per prompt or conversation with `ToolTracker().scope()`.
+    Scopes live in a context variable, so every thread and asyncio task
+    records into its own scope without locking. Work handed to an executor
+    must run in a copy of the caller's context (`contextvars.copy_context()`
+    or `asyncio.to_thread`) to record into the caller's scope. Calls made
+    outside any scope go to a process-wide default scope.
+    """
     _instance = None
-    
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance.tool_calls = []
+            cls._instance._default_scope = TrackingScope()
         return cls._instance
-    
+
+    @contextmanager
+    def scope(self) -> Iterator[TrackingScope]:
+        """Open a new tracking scope for the current context and yield it."""
+        scope = TrackingScope()
+        token = _current_scope.set(scope)
+        try:
+            yield scope
+        finally:
+            _current_scope.reset(token)
+
+    def current_scope(self) -> TrackingScope:
+        return _current_scope.get() or self._default_scope
+
+    @property
+    def tool_calls(self) -> List[Dict[str, Any]]:
+        return self.current_scope().tool_calls
+
     def add_tool_call(self, tool_name: str, args: Dict[str, Any], duration: float, result: str):
-        self.tool_calls.append({
+        self.current_scope().tool_calls.append({
             "tool_name": tool_name,
             "timestamp": datetime.now().isoformat(),
             "arguments": args,
             "duration": duration,
             "result": result
         })
-    
+
+    def add_usage(self, model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0):
+        """Record the token usage of one model completion."""
+        self.current_scope().usage.append({
+            "model": model,
+            "timestamp": datetime.now().isoformat(),
+            "prompt_tokens": prompt_tokens or 0,
+            "completion_tokens": completion_tokens or 0,
+            "cached_tokens": cached_tokens or 0,
+        })
+
+    def add_turn(self, ttft: float, model_time: float, tool_time: float,
+                 framework_time: float, turn_time: float):
+        """Record the latency breakdown of one agent turn."""
+        self.current_scope().turns.append({
+            "ttft": ttft,
+            "model_time": model_time,
+            "tool_time": tool_time,
+            "framework_time": framework_time,
+            "turn_time": turn_time,
+        })
+
     def get_tool_calls(self) -> List[Dict[str, Any]]:
         return self.tool_calls
-    
+
     def clear(self):
-        self.tool_calls = []
+        self.current_scope().tool_calls = []
+        self.current_scope().usage = []
+        self.current_scope().turns = []
 
 def track_tool_usage(func: Callable) -> Callable:
     @wraps(func)
@@ -34,24 +115,30 @@ def track_tool_usage(func: Callable) -> Callable:
         start_time = time.perf_counter()
 
         try:
-            result = func(*args, **kwargs)
+            with span(f"tool.{func.__name__}", tool=func.__name__) as tool_span:
+                result = func(*args, **kwargs)
+                if tracing_enabled():
+                    tool_span.set(
+                        args_bytes=sum(len(str(value)) for value in (*args, *kwargs.values())),
+                        result_bytes=len(str(result)),
+                    )
             duration = time.perf_counter() - start_time
-            
+
             # Combine args and kwargs for tracking
             all_args = {
                 **{f"arg_{i}": arg for i, arg in enumerate(args)},
                 **kwargs
             }
-            
+
             tracker.add_tool_call(
                 tool_name=func.__name__,
                 args=all_args,
                 duration=duration,
                 result=str(result)
             )
-            
+
             return result
-            
+
         except Exception as e:
             duration = time.perf_counter() - start_time
             tracker.add_tool_call(
@@ -61,5 +148,5 @@ def track_tool_usage(func: Callable) -> Callable:
                 result=f"Error: {str(e)}"
             )
             raise
-    
+
     return wrapper
\ No newline at end of file